@@ -5,8 +5,11 @@ If you want grep, use rg. If you want semantic understanding, use hhg.
 
 import json
 import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import typer
 from rich.console import Console
@@ -15,6 +18,10 @@ from rich.status import Status
 
 from . import __version__
 
+if TYPE_CHECKING:
+    from .reranker import Reranker
+    from .semantic import SemanticIndex
+
 # Consoles
 console = Console()
 err_console = Console(stderr=True)
@@ -27,6 +34,9 @@ EXIT_ERROR = 2
 # Index directory
 INDEX_DIR = ".hhg"
 
+# Reranker shared across fast searches in one process (model load dominates)
+_reranker: "Reranker | None" = None
+
 app = typer.Typer(
     name="hhg",
     help="Semantic code search",
@@ -58,40 +68,52 @@ def index_exists(root: Path) -> bool:
     return (index_path / "manifest.json").exists()
 
 
-def build_index(root: Path, quiet: bool = False) -> None:
-    """Build semantic index for directory."""
+def build_index(
+    root: Path, quiet: bool = False, index: "SemanticIndex | None" = None
+) -> dict[str, str]:
+    """Build semantic index for directory.
+
+    Args:
+        root: Directory to index.
+        quiet: Suppress progress output.
+        index: Existing SemanticIndex for root to reuse (avoids reloading the model).
+
+    Returns:
+        Scanned files (path -> content), for callers that need them afterwards.
+    """
     from .scanner import scan
     from .semantic import SemanticIndex
 
     root = root.resolve()
+    file_stats: dict[str, tuple[int, int]] = {}
 
     if quiet:
         # Quiet mode: no progress display
-        files = scan(str(root), ".", include_hidden=False)
+        files = scan(str(root), ".", include_hidden=False, stats=file_stats)
         if not files:
-            return
-        index = SemanticIndex(root)
-        index.index(files)
-        return
+            return files
+        index = index or SemanticIndex(root)
+        index.index(files, file_stats=file_stats)
+        return files
 
     # Interactive mode: show spinner for scanning
     with Status("Scanning files...", console=err_console):
         t0 = time.perf_counter()
-        files = scan(str(root), ".", include_hidden=False)
+        files = scan(str(root), ".", include_hidden=False, stats=file_stats)
         scan_time = time.perf_counter() - t0
 
     if not files:
         err_console.print("[yellow]No files found to index[/]")
-        return
+        return files
 
     err_console.print(f"[dim]Found {len(files)} files ({scan_time:.1f}s)[/]")
 
     # Phase 2: Extract and embed
-    index = SemanticIndex(root)
+    index = index or SemanticIndex(root)
 
     with Status("Indexing...", console=err_console):
         t0 = time.perf_counter()
-        stats = index.index(files)
+        stats = index.index(files, file_stats=file_stats)
         index_time = time.perf_counter() - t0
 
     # Summary
@@ -102,6 +124,8 @@ def build_index(root: Path, quiet: bool = False) -> None:
     if stats["skipped"]:
         err_console.print(f"[dim]  Skipped {stats['skipped']} unchanged files[/]")
 
+    return files
+
 
 def semantic_search(
     query: str,
@@ -109,6 +133,7 @@ def semantic_search(
     index_root: Path,
     n: int = 10,
     threshold: float = 0.0,
+    index: "SemanticIndex | None" = None,
 ) -> list[dict]:
     """Run semantic search.
 
@@ -118,11 +143,13 @@ def semantic_search(
         index_root: Root directory where index lives.
         n: Number of results.
         threshold: Minimum score filter.
+        index: Existing SemanticIndex to reuse (must be scoped to search_path).
     """
     from .semantic import SemanticIndex
 
-    # Pass search_scope if searching a subdirectory
-    index = SemanticIndex(index_root, search_scope=search_path)
+    if index is None:
+        # Pass search_scope if searching a subdirectory
+        index = SemanticIndex(index_root, search_scope=search_path)
     results = index.search(query, k=n)
 
     # Filter by threshold if specified (any non-zero value)
@@ -166,6 +193,16 @@ def grep_search(pattern: str, root: Path) -> list[dict]:
     return results
 
 
+def _get_reranker() -> "Reranker":
+    """Get the shared reranker, loading the model on first use."""
+    global _reranker
+    if _reranker is None:
+        from .reranker import Reranker
+
+        _reranker = Reranker()
+    return _reranker
+
+
 def fast_search(
     query: str,
     root: Path,
@@ -173,7 +210,6 @@ def fast_search(
     max_candidates: int = 100,
 ) -> list[dict]:
     """Grep + neural rerank (no index required)."""
-    from .reranker import Reranker
     from .scanner import scan
 
     # Scan for matches
@@ -183,7 +219,7 @@ def fast_search(
         return []
 
     # Rerank with neural model
-    reranker = Reranker()
+    reranker = _get_reranker()
     results = reranker.search(query, files, top_k=n, max_candidates=max_candidates)
 
     # Normalize output format (start_line -> line)
@@ -493,55 +529,72 @@ def search(
         err_console.print("\n[dim]Tip: Use -f for fast mode or -e for exact match[/]")
         raise typer.Exit(EXIT_ERROR)
 
+    from .semantic import SemanticIndex
+
     # Walk up to find existing index, or determine where to create one
     index_root, existing_index = find_index(path)
     search_path = path  # May be a subdir of index_root
 
-    # Check if index exists
+    # Check if index exists (auto-build is enabled via env var)
+    auto_build = os.environ.get("HHG_AUTO_BUILD", "").lower() in ("1", "true", "yes")
+    if existing_index is None and not auto_build:
+        # Require explicit build
+        err_console.print("[red]Error:[/] No index found. Run 'hhg build' first.")
+        err_console.print("[dim]Tip: Use -f for fast mode, or set HHG_AUTO_BUILD=1[/]")
+        raise typer.Exit(EXIT_ERROR)
+
+    # One index (and embedding model) for build, update, and search
+    index = SemanticIndex(index_root, search_scope=search_path)
+
     if existing_index is None:
-        # Check if auto-build is enabled via env var
-        if os.environ.get("HHG_AUTO_BUILD", "").lower() in ("1", "true", "yes"):
-            # Auto-build enabled
-            if not quiet:
-                err_console.print("[dim]Building index (HHG_AUTO_BUILD=1)...[/]")
-            build_index(path, quiet=quiet)
-            index_root = path
-        else:
-            # Require explicit build
-            err_console.print("[red]Error:[/] No index found. Run 'hhg build' first.")
-            err_console.print("[dim]Tip: Use -f for fast mode, or set HHG_AUTO_BUILD=1[/]")
-            raise typer.Exit(EXIT_ERROR)
+        if not quiet:
+            err_console.print("[dim]Building index (HHG_AUTO_BUILD=1)...[/]")
+        build_index(path, quiet=quiet, index=index)
 
     if not no_index:
         # Found existing index - check for stale files and auto-update
-        from .scanner import scan
-        from .semantic import SemanticIndex
+        from .scanner import read_files, scan_metadata
 
         if not quiet and index_root != search_path:
             err_console.print(f"[dim]Using index at {index_root}[/]")
 
-        files = scan(str(index_root), ".", include_hidden=False)
-        index = SemanticIndex(index_root)
-        stale_count = index.needs_update(files)
+        # Stat first; only read files whose mtime/size differ from the manifest
+        metadata = scan_metadata(index_root, include_hidden=False)
+        candidates, deleted = index.get_stale_paths(metadata)
 
-        if stale_count > 0:
-            if not quiet:
-                with Status(f"Updating {stale_count} changed files...", console=err_console):
-                    stats = index.update(files)
-                if stats.get("blocks", 0) > 0:
-                    err_console.print(f"[dim]  Updated {stats['blocks']} blocks[/]")
-            else:
-                index.update(files)
+        if candidates or deleted:
+            file_stats: dict[str, tuple[int, int]] = {}
+            files = read_files(candidates, stats=file_stats)
+            changed, unreadable = index.get_stale_files(
+                files, paths=candidates, file_stats=file_stats
+            )
+            deleted += unreadable
+            stale_count = len(changed) + len(deleted)
+
+            if stale_count > 0:
+                # Already checked, so update() skips its own staleness check
+                changed_files = {f: files[f] for f in changed}
+                if not quiet:
+                    with Status(f"Updating {stale_count} changed files...", console=err_console):
+                        stats = index.update(changed_files, deleted=deleted, file_stats=file_stats)
+                    if stats.get("blocks", 0) > 0:
+                        err_console.print(f"[dim]  Updated {stats['blocks']} blocks[/]")
+                else:
+                    index.update(changed_files, deleted=deleted, file_stats=file_stats)
 
     # Run semantic search
     if not quiet:
         with Status(f"Searching for: {query}...", console=err_console):
             t0 = time.perf_counter()
-            results = semantic_search(query, search_path, index_root, n=n, threshold=threshold)
+            results = semantic_search(
+                query, search_path, index_root, n=n, threshold=threshold, index=index
+            )
             search_time = time.perf_counter() - t0
     else:
         t0 = time.perf_counter()
-        results = semantic_search(query, search_path, index_root, n=n, threshold=threshold)
+        results = semantic_search(
+            query, search_path, index_root, n=n, threshold=threshold, index=index
+        )
         search_time = time.perf_counter() - t0
 
     if not results:
@@ -578,13 +631,18 @@ def status(path: Path = typer.Argument(Path("."), help="Directory")):
     index = SemanticIndex(path)
     block_count = index.count()
 
-    # Get file count from manifest
+    # Get file count from manifest (entries without a hash are unindexable files)
     manifest = index._load_manifest()
-    file_count = len(manifest.get("files", {}))
+    file_count = sum(
+        1
+        for entry in manifest.get("files", {}).values()
+        if not isinstance(entry, dict) or "hash" in entry
+    )
 
     # Check for stale files
-    files = scan(str(path), ".", include_hidden=False)
-    changed, deleted = index.get_stale_files(files)
+    file_stats: dict[str, tuple[int, int]] = {}
+    files = scan(str(path), ".", include_hidden=False, stats=file_stats)
+    changed, deleted = index.get_stale_files(files, file_stats=file_stats)
     stale_count = len(changed) + len(deleted)
 
     if stale_count == 0:
@@ -636,23 +694,25 @@ def build(
     # Find subdir indexes that will be superseded
     subdir_indexes = find_subdir_indexes(path)
 
+    # One index (and embedding model) for clear, merge, build, and update
+    index = SemanticIndex(path)
+
     if force and index_exists(path):
         # Full rebuild: clear first
-        index = SemanticIndex(path)
         index.clear()
         if not quiet:
             err_console.print("[dim]Cleared existing index[/]")
-        build_index(path, quiet=quiet)
+        build_index(path, quiet=quiet, index=index)
     elif index_exists(path):
         # Incremental update
+        file_stats: dict[str, tuple[int, int]] = {}
         if not quiet:
             with Status("Scanning files...", console=err_console):
-                files = scan(str(path), ".", include_hidden=False)
+                files = scan(str(path), ".", include_hidden=False, stats=file_stats)
         else:
-            files = scan(str(path), ".", include_hidden=False)
+            files = scan(str(path), ".", include_hidden=False, stats=file_stats)
 
-        index = SemanticIndex(path)
-        changed, deleted = index.get_stale_files(files)
+        changed, deleted = index.get_stale_files(files, file_stats=file_stats)
         stale_count = len(changed) + len(deleted)
 
         if stale_count == 0:
@@ -662,9 +722,9 @@ def build(
         else:
             if not quiet:
                 with Status(f"Updating {stale_count} files...", console=err_console):
-                    stats = index.update(files)
+                    stats = index.update(files, file_stats=file_stats)
             else:
-                stats = index.update(files)
+                stats = index.update(files, file_stats=file_stats)
 
             if not quiet:
                 console.print(
@@ -680,7 +740,6 @@ def build(
         if subdir_indexes:
             if not quiet:
                 err_console.print(f"[dim]Merging {len(subdir_indexes)} subdir index(es)...[/]")
-            index = SemanticIndex(path)
             total_merged = 0
             for idx in subdir_indexes:
                 merge_stats = index.merge_from_subdir(idx)
@@ -691,13 +750,10 @@ def build(
                     err_console.print(f"[dim]  Merged {total_merged} blocks from subdir indexes[/]")
 
         # Build (will skip files already merged via hash matching)
-        build_index(path, quiet=quiet)
+        files = build_index(path, quiet=quiet, index=index)
 
         # If we merged, clean up any deleted files from merged manifests
         if merged_any:
-            # Reopen index to get fresh state after build
-            index = SemanticIndex(path)
-            files = scan(str(path), ".", include_hidden=False)
             _changed, deleted = index.get_stale_files(files)
             if deleted:
                 index.update(files)
@@ -824,16 +880,31 @@ def install() -> None:
 
     for name, repo, files in models:
         console.print(f"[dim]Downloading {name} ({repo})...[/]")
-        for filename in files:
-            hf_hub_download(repo_id=repo, filename=filename, force_download=True)
+        with ThreadPoolExecutor(max_workers=len(files)) as executor:
+            futures = [
+                executor.submit(hf_hub_download, repo_id=repo, filename=f, force_download=True)
+                for f in files
+            ]
+            for future in futures:
+                future.result()
 
     console.print("[green]✓[/] All models installed")
 
 
-def main():
-    """Entry point."""
-    app()
+def main(argv: list[str] | None = None, prog_name: str | None = None) -> int:
+    """Entry point. Runs the CLI on argv (default: sys.argv[1:]) and returns the exit code."""
+    try:
+        app(args=argv if argv is not None else sys.argv[1:], prog_name=prog_name)
+    except SystemExit as e:
+        if e.code is None:
+            return EXIT_MATCH
+        if isinstance(e.code, int):
+            return e.code
+        # Like the interpreter: any other code is a message for stderr
+        print(e.code, file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_MATCH
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
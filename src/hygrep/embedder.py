@@ -1,14 +1,20 @@
-"""Embedder - ONNX text embeddings for semantic search."""
+"""Embedder - ONNX text embeddings for semantic search.
+
+onnxruntime, tokenizers, and huggingface_hub are imported on first model
+load, so importing this module (e.g. via semantic for `hhg status`) is cheap.
+"""
 
 import os
+import platform
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import numpy as np
-import onnxruntime as ort
-from huggingface_hub import hf_hub_download
-from tokenizers import Tokenizer
 
-# Suppress ONNX Runtime warnings
-ort.set_default_logger_severity(3)
+if TYPE_CHECKING:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
 
 # ModernBERT-embed-base: code-aware, Matryoshka dims
 # INT8 quantized for speed and size (~150MB)
@@ -18,97 +24,217 @@ TOKENIZER_FILE = "tokenizer.json"
 DIMENSIONS = 256  # Matryoshka: 768 full, 256 reduced (3x smaller index)
 MAX_LENGTH = 512  # Truncate to 512 tokens (enough for most functions, 16x faster than 8192)
 BATCH_SIZE = 32  # Larger batches for better throughput (benchmarked: 32 is 15% faster than 16)
+MAX_THREADS = 8  # Intra-op threads; more adds sync overhead for a base-size encoder
 
 # Prefixes required by ModernBERT-embed
 QUERY_PREFIX = "search_query: "
 DOCUMENT_PREFIX = "search_document: "
 
 
+def _session_options() -> "ort.SessionOptions":
+    """Base session options shared by all load paths."""
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = min(MAX_THREADS, os.cpu_count() or 4)
+    # Encoder graph is a single chain: no independent branches for inter-op threads
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.inter_op_num_threads = 1
+    # Reuse allocations across runs instead of a malloc per intermediate
+    opts.enable_cpu_mem_arena = True
+    opts.enable_mem_pattern = True
+    # Keep workers spinning between ops (lower latency on short batches)
+    opts.add_session_config_entry("session.intra_op.allow_spinning", "1")
+    return opts
+
+
+def _optimized_model_path(model_path: str) -> Path:
+    """Path of the cached optimized graph (keyed by ORT version, CPU arch, and level)."""
+    import onnxruntime as ort
+
+    path = Path(model_path)
+    return path.with_name(f"{path.stem}.ort{ort.__version__}-{platform.machine()}-ext.ort")
+
+
 class Embedder:
     """Generate text embeddings using ONNX model."""
 
     def __init__(self, cache_dir: str | None = None):
         self.cache_dir = cache_dir
-        self._session: ort.InferenceSession | None = None
-        self._tokenizer: Tokenizer | None = None
+        self._session: "ort.InferenceSession | None" = None
+        self._tokenizer: "Tokenizer | None" = None
+        self._token_type_ids: np.ndarray | None = None  # Reusable zeros buffer
 
     def _ensure_loaded(self) -> None:
         """Lazy load model and tokenizer."""
         if self._session is not None:
             return
 
-        # Download model files
-        model_path = hf_hub_download(
-            repo_id=MODEL_REPO,
-            filename=MODEL_FILE,
-            cache_dir=self.cache_dir,
-        )
-        tokenizer_path = hf_hub_download(
-            repo_id=MODEL_REPO,
-            filename=TOKENIZER_FILE,
-            cache_dir=self.cache_dir,
-        )
+        from huggingface_hub.utils import LocalEntryNotFoundError
+        from tokenizers import Tokenizer
+
+        # Use local cache when available (no network check), download on first use
+        try:
+            model_path, tokenizer_path = self._download(local_files_only=True)
+        except LocalEntryNotFoundError:
+            model_path, tokenizer_path = self._download(local_files_only=False)
 
         # Load tokenizer with truncation for efficiency
         self._tokenizer = Tokenizer.from_file(tokenizer_path)
         self._tokenizer.enable_truncation(max_length=MAX_LENGTH)
         self._tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
 
-        # Load ONNX model
-        opts = ort.SessionOptions()
-        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-        opts.intra_op_num_threads = os.cpu_count() or 4
+        self._session = self._load_session(model_path)
+
+        # Cache input/output names
+        self._input_names = [i.name for i in self._session.get_inputs()]
+        self._output_names = [o.name for o in self._session.get_outputs()]
+
+    def _download(self, local_files_only: bool) -> tuple[str, str]:
+        """Get paths to model and tokenizer files from the HF cache."""
+        from huggingface_hub import hf_hub_download
+
+        def fetch(filename: str) -> str:
+            return hf_hub_download(
+                repo_id=MODEL_REPO,
+                filename=filename,
+                cache_dir=self.cache_dir,
+                local_files_only=local_files_only,
+            )
+
+        if local_files_only:
+            return fetch(MODEL_FILE), fetch(TOKENIZER_FILE)
+
+        # Network fetches are independent; overlap them
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            model_future = executor.submit(fetch, MODEL_FILE)
+            tokenizer_future = executor.submit(fetch, TOKENIZER_FILE)
+            return model_future.result(), tokenizer_future.result()
+
+    def _load_session(self, model_path: str) -> "ort.InferenceSession":
+        """Load ONNX model, reusing a pre-optimized graph from earlier runs.
+
+        The first load runs graph optimization and saves the result in ORT
+        format next to the model. Later loads skip optimization entirely.
+
+        The saved graph stops at ORT_ENABLE_EXTENDED: ORT_ENABLE_ALL adds layout
+        optimizations that may depend on the exact CPU, and the HF cache can be
+        shared between machines (CI caches, NFS homes, container volumes).
+        """
+        import onnxruntime as ort
+
+        # Suppress ONNX Runtime warnings
+        ort.set_default_logger_severity(3)
 
-        self._session = ort.InferenceSession(
+        optimized_path = _optimized_model_path(model_path)
+
+        if optimized_path.exists():
+            opts = _session_options()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            opts.add_session_config_entry("session.load_model_format", "ORT")
+            try:
+                return ort.InferenceSession(
+                    str(optimized_path),
+                    sess_options=opts,
+                    providers=["CPUExecutionProvider"],
+                )
+            except Exception:
+                # Corrupt or incompatible: re-optimize from the original model
+                optimized_path.unlink(missing_ok=True)
+
+        # Write to a temp file, then rename, so concurrent runs never see a partial file
+        tmp_path = optimized_path.with_name(f"{optimized_path.name}.{os.getpid()}.tmp")
+        opts = _session_options()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        opts.optimized_model_filepath = str(tmp_path)
+        opts.add_session_config_entry("session.save_model_format", "ORT")
+        try:
+            session = ort.InferenceSession(
+                model_path,
+                sess_options=opts,
+                providers=["CPUExecutionProvider"],
+            )
+            os.replace(tmp_path, optimized_path)
+            return session
+        except Exception:
+            # Cache dir not writable, etc. - load without saving
+            tmp_path.unlink(missing_ok=True)
+
+        opts = _session_options()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(
             model_path,
             sess_options=opts,
             providers=["CPUExecutionProvider"],
         )
 
-        # Cache input/output names
-        self._input_names = [i.name for i in self._session.get_inputs()]
-        self._output_names = [o.name for o in self._session.get_outputs()]
+    def _get_token_type_ids(self, shape: tuple[int, int]) -> np.ndarray:
+        """Get a contiguous zeros array of the given shape, reusing a cached buffer."""
+        size = shape[0] * shape[1]
+        if self._token_type_ids is None or self._token_type_ids.size < size:
+            self._token_type_ids = np.zeros(max(size, BATCH_SIZE * MAX_LENGTH), dtype=np.int64)
+        return self._token_type_ids[:size].reshape(shape)
 
-    def _embed_batch(self, texts: list[str]) -> np.ndarray:
-        """Generate embeddings for a batch of texts (internal)."""
+    def _tokenize(self, texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Tokenize a batch into (input_ids, attention_mask) arrays."""
         self._ensure_loaded()
         assert self._tokenizer is not None
-        assert self._session is not None
 
-        # Tokenize
+        # Padding makes every encoding the batch's longest length
         encoded = self._tokenizer.encode_batch(texts)
-        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
-        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        shape = (len(encoded), len(encoded[0].ids))
+
+        # Fill preallocated rows directly (avoids intermediate list[list[int]])
+        input_ids = np.empty(shape, dtype=np.int64)
+        attention_mask = np.empty(shape, dtype=np.int64)
+        for i, e in enumerate(encoded):
+            input_ids[i] = e.ids
+            attention_mask[i] = e.attention_mask
+
+        return input_ids, attention_mask
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Generate embeddings for a batch of texts (internal)."""
+        return self._infer(*self._tokenize(texts))
+
+    def _infer(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Run the model on a tokenized batch and pool to normalized embeddings."""
+        self._ensure_loaded()
+        assert self._session is not None
+        shape = input_ids.shape
 
         # Build inputs dict based on what model expects
         inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
         if "token_type_ids" in self._input_names:
-            inputs["token_type_ids"] = np.zeros_like(input_ids)
+            inputs["token_type_ids"] = self._get_token_type_ids(shape)
 
-        # Run inference
-        outputs = self._session.run(None, inputs)
+        # Run inference via IO binding: ORT reads the numpy inputs in place, and
+        # only the output we pool is fetched (other model outputs are skipped)
+        use_sentence = "sentence_embedding" in self._output_names
+        binding = self._session.io_binding()
+        for name, array in inputs.items():
+            binding.bind_cpu_input(name, array)
+        binding.bind_output("sentence_embedding" if use_sentence else self._output_names[0])
+        self._session.run_with_iobinding(binding)
+        output = binding.get_outputs()[0].numpy()
 
-        # Handle different output formats
-        if "sentence_embedding" in self._output_names:
+        # Handle different output formats (truncating to Matryoshka dimensions)
+        if use_sentence:
             # Direct sentence embedding output
-            idx = self._output_names.index("sentence_embedding")
-            embeddings = outputs[idx]
+            embeddings = output[:, :DIMENSIONS].astype(np.float32)
         else:
-            # Mean pooling over token embeddings
-            token_embeddings = outputs[0]  # (batch, seq_len, hidden_size)
-            mask_expanded = attention_mask[:, :, np.newaxis].astype(np.float32)
-            sum_embeddings = np.sum(token_embeddings * mask_expanded, axis=1)
-            sum_mask = np.sum(mask_expanded, axis=1)
-            embeddings = sum_embeddings / np.maximum(sum_mask, 1e-9)
+            # Mean pooling over token embeddings as one batched (B,1,S) @ (B,S,H)
+            # product, so the masked (B,S,H) intermediate is never materialized.
+            # Dividing by token count is skipped: L2 normalization cancels it.
+            token_embeddings = output[:, :, :DIMENSIONS]  # (batch, seq_len, dims)
+            mask = attention_mask.astype(np.float32)[:, np.newaxis, :]
+            embeddings = np.matmul(mask, token_embeddings)[:, 0, :]
 
-        # Truncate to Matryoshka dimensions
-        embeddings = embeddings[:, :DIMENSIONS]
-
-        # L2 normalize
+        # L2 normalize (in place)
         norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-        embeddings = embeddings / np.maximum(norms, 1e-9)
+        np.divide(embeddings, np.maximum(norms, 1e-9), out=embeddings)
 
-        return embeddings.astype(np.float32)
+        return embeddings
 
     def embed(self, texts: list[str]) -> np.ndarray:
         """Generate embeddings for documents (for indexing).
@@ -125,14 +251,30 @@ class Embedder:
         # Add document prefix for ModernBERT
         prefixed = [DOCUMENT_PREFIX + t for t in texts]
 
-        # Process in batches to avoid memory issues and reduce padding waste
-        all_embeddings = []
-        for i in range(0, len(prefixed), BATCH_SIZE):
-            batch = prefixed[i : i + BATCH_SIZE]
-            embeddings = self._embed_batch(batch)
-            all_embeddings.append(embeddings)
+        # Smart batching: sort by length so each batch pads to a similar length
+        # (character count is a cheap proxy for token count)
+        order = sorted(range(len(prefixed)), key=lambda i: len(prefixed[i]), reverse=True)
+
+        # Process in batches to avoid memory issues, writing back in input order
+        batches = [order[i : i + BATCH_SIZE] for i in range(0, len(order), BATCH_SIZE)]
+        all_embeddings = np.empty((len(prefixed), DIMENSIONS), dtype=np.float32)
+
+        if len(batches) == 1:
+            all_embeddings[batches[0]] = self._embed_batch([prefixed[j] for j in batches[0]])
+            return all_embeddings
+
+        # Pipeline: tokenize batch N+1 in a thread while batch N runs inference
+        # (both the tokenizer and ONNX Runtime release the GIL)
+        self._ensure_loaded()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(self._tokenize, [prefixed[j] for j in batches[0]])
+            for n, batch_idx in enumerate(batches):
+                input_ids, attention_mask = pending.result()
+                if n + 1 < len(batches):
+                    pending = pool.submit(self._tokenize, [prefixed[j] for j in batches[n + 1]])
+                all_embeddings[batch_idx] = self._infer(input_ids, attention_mask)
 
-        return np.vstack(all_embeddings)
+        return all_embeddings
 
     def embed_one(self, text: str) -> np.ndarray:
         """Embed a single query string (for search)."""
@@ -6,14 +6,9 @@ from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
-import onnxruntime as ort
-from tokenizers import Tokenizer
 
 from .extractor import ContextExtractor
 
-# Suppress ONNX Runtime warnings (CoreML capability messages, etc.)
-ort.set_default_logger_severity(3)  # ERROR level only
-
 MODEL_REPO = "mixedbread-ai/mxbai-rerank-xsmall-v1"
 MODEL_FILE = "onnx/model_quantized.onnx"
 TOKENIZER_FILE = "tokenizer.json"
@@ -95,14 +90,12 @@ def get_model_paths() -> tuple[str, str]:
     except LocalEntryNotFoundError:
         # First use - download model
         print(f"Downloading model ({MODEL_REPO})...", file=sys.stderr)
-        model_path = hf_hub_download(
-            repo_id=MODEL_REPO,
-            filename=MODEL_FILE,
-        )
-        tokenizer_path = hf_hub_download(
-            repo_id=MODEL_REPO,
-            filename=TOKENIZER_FILE,
-        )
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            model_future = executor.submit(hf_hub_download, repo_id=MODEL_REPO, filename=MODEL_FILE)
+            tokenizer_future = executor.submit(
+                hf_hub_download, repo_id=MODEL_REPO, filename=TOKENIZER_FILE
+            )
+            model_path, tokenizer_path = model_future.result(), tokenizer_future.result()
         print("Model ready.", file=sys.stderr)
 
     return model_path, tokenizer_path
@@ -112,7 +105,8 @@ def download_model(force: bool = False, quiet: bool = False) -> tuple[str, str]:
     """Download model files from HuggingFace Hub.
 
     Args:
-        force: Force re-download even if cached
+        force: Force re-download even if cached (otherwise cached files are
+            returned without touching the network)
         quiet: Suppress progress messages
 
     Returns:
@@ -121,20 +115,30 @@ def download_model(force: bool = False, quiet: bool = False) -> tuple[str, str]:
     _setup_hf_cache()
 
     from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import LocalEntryNotFoundError
+
+    if not force:
+        # Already cached - skip the network entirely
+        try:
+            return (
+                hf_hub_download(repo_id=MODEL_REPO, filename=MODEL_FILE, local_files_only=True),
+                hf_hub_download(repo_id=MODEL_REPO, filename=TOKENIZER_FILE, local_files_only=True),
+            )
+        except LocalEntryNotFoundError:
+            pass
 
     if not quiet:
         print(f"Downloading model from {MODEL_REPO}...", file=sys.stderr)
 
-    model_path = hf_hub_download(
-        repo_id=MODEL_REPO,
-        filename=MODEL_FILE,
-        force_download=force,
-    )
-    tokenizer_path = hf_hub_download(
-        repo_id=MODEL_REPO,
-        filename=TOKENIZER_FILE,
-        force_download=force,
-    )
+    # Both files are independent network fetches; overlap them
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        model_future = executor.submit(
+            hf_hub_download, repo_id=MODEL_REPO, filename=MODEL_FILE, force_download=force
+        )
+        tokenizer_future = executor.submit(
+            hf_hub_download, repo_id=MODEL_REPO, filename=TOKENIZER_FILE, force_download=force
+        )
+        model_path, tokenizer_path = model_future.result(), tokenizer_future.result()
 
     if not quiet:
         size_mb = os.path.getsize(model_path) / 1024 / 1024
@@ -222,6 +226,8 @@ def clean_model_cache() -> bool:
 
 def get_execution_providers() -> list:
     """Auto-detect best available execution provider."""
+    import onnxruntime as ort
+
     available = ort.get_available_providers()
 
     # Prefer GPU providers in order
@@ -241,6 +247,13 @@ class Reranker:
     """Cross-encoder reranker using ONNX Runtime."""
 
     def __init__(self, num_threads: int = 4):
+        # Heavy imports deferred until a reranker is needed (keeps `hhg model` fast)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        # Suppress ONNX Runtime warnings (CoreML capability messages, etc.)
+        ort.set_default_logger_severity(3)  # ERROR level only
+
         model_path, tokenizer_path = get_model_paths()
 
         self.extractor = ContextExtractor()
@@ -269,6 +282,30 @@ class Reranker:
             )
         self.provider = self.session.get_providers()[0]
 
+        self._input_names = [x.name for x in self.session.get_inputs()]
+        self._use_token_type_ids = len(self._input_names) > 2
+
+    def _score_pairs(self, pairs: list[tuple[str, str]]) -> np.ndarray:
+        """Run (query, text) pairs through the model, returning raw logits."""
+        encodings = self.tokenizer.encode_batch(pairs)
+
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        inputs = {
+            self._input_names[0]: input_ids,
+            self._input_names[1]: attention_mask,
+        }
+        if self._use_token_type_ids:
+            token_type_ids = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            inputs[self._input_names[2]] = token_type_ids
+
+        return self.session.run(None, inputs)[0].flatten()
+
+    def warmup(self) -> None:
+        """Run one trivial pair so first-inference setup isn't paid by a real query."""
+        self._score_pairs([("x", "y")])
+
     def search(
         self,
         query: str,
@@ -327,28 +364,11 @@ class Reranker:
         # 2. Reranking Phase (Batched)
         BATCH_SIZE = 32
         all_logits = []
-        input_names = [x.name for x in self.session.get_inputs()]
-        use_token_type_ids = len(input_names) > 2
 
         for i in range(0, len(candidates), BATCH_SIZE):
             batch = candidates[i : i + BATCH_SIZE]
             pairs = [(query, c["score_text"]) for c in batch]
-
-            encodings = self.tokenizer.encode_batch(pairs)
-
-            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
-            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
-
-            inputs = {
-                input_names[0]: input_ids,
-                input_names[1]: attention_mask,
-            }
-            if use_token_type_ids:
-                token_type_ids = np.array([e.type_ids for e in encodings], dtype=np.int64)
-                inputs[input_names[2]] = token_type_ids
-
-            res = self.session.run(None, inputs)
-            all_logits.extend(res[0].flatten())
+            all_logits.extend(self._score_pairs(pairs))
 
         # 3. Score and sort
         scored_results = []
@@ -2,6 +2,9 @@
 
 import os
 import re
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Directories to always skip
@@ -90,97 +93,217 @@ BINARY_EXTENSIONS = frozenset(
 
 MAX_FILE_SIZE = 1_000_000  # 1MB
 
+# Files modified this recently may change again within the same mtime tick,
+# so their stat info isn't trusted for change detection (like git's "racy" check)
+RACY_WINDOW_NS = 2_000_000_000
+
 
 def _is_binary_content(content: bytes, check_size: int = 8192) -> bool:
     """Check if content appears to be binary (contains null bytes)."""
     return b"\x00" in content[:check_size]
 
 
-def scan(root: str | Path, pattern: str, include_hidden: bool = False) -> dict[str, str]:
+def _iter_files(root: str, include_hidden: bool) -> Iterator[os.DirEntry]:
+    """Walk directory tree with os.scandir, yielding candidate file entries.
+
+    Applies name-based filters only (ignored dirs, hidden, binary extensions,
+    lock files). Uses cached DirEntry type info instead of a stat per path.
+    Symlinked directories are not followed, so symlink loops can't recurse.
+    """
+    stack = [root]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+
+            # Skip hidden files and directories unless flag set
+            if not include_hidden and name.startswith("."):
+                continue
+
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in IGNORED_DIRS:
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+
+            # Skip binary extensions
+            _, ext = os.path.splitext(name)
+            if ext.lower() in BINARY_EXTENSIONS:
+                continue
+
+            # Skip lock files by pattern
+            if name.endswith("-lock.json"):
+                continue
+
+            yield entry
+
+        # Visit subdirectories in listing order (depth-first, like os.walk)
+        stack.extend(reversed(subdirs))
+
+
+def _check_root(root: str | Path) -> Path:
+    """Validate that root exists and is a directory."""
+    root_path = Path(root) if isinstance(root, str) else root
+    if not root_path.exists():
+        raise ValueError(f"Path does not exist: {root}")
+    if not root_path.is_dir():
+        raise ValueError(f"Path is not a directory: {root}")
+    return root_path
+
+
+def _read_text(path: str) -> tuple[str | None, os.stat_result] | None:
+    """Read a file as UTF-8 text, or None if too large or unreadable.
+
+    Returns the content with the file's stat, taken from the open file before
+    reading: if the file changes after that, the stat no longer matches it.
+    Content is None for files that were read but are binary or not UTF-8.
+    """
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+
+            # Skip large files
+            if st.st_size > MAX_FILE_SIZE:
+                return None
+
+            # Read and check content
+            content_bytes = f.read()
+    except OSError:
+        return None
+
+    # Skip binary files
+    if _is_binary_content(content_bytes):
+        return None, st
+
+    # Decode as UTF-8
+    try:
+        return content_bytes.decode("utf-8"), st
+    except UnicodeDecodeError:
+        return None, st
+
+
+def _record_stat(stats: dict[str, tuple[int, int]], path: str, st: os.stat_result) -> None:
+    """Add a file's (mtime_ns, size) to stats unless it was modified too recently to trust."""
+    if time.time_ns() - st.st_mtime_ns >= RACY_WINDOW_NS:
+        stats[path] = (st.st_mtime_ns, st.st_size)
+
+
+def scan(
+    root: str | Path,
+    pattern: str,
+    include_hidden: bool = False,
+    stats: dict[str, tuple[int, int]] | None = None,
+) -> dict[str, str]:
     """
     Scan directory tree for files matching regex pattern.
 
+    Files are read in a thread pool (I/O releases the GIL).
+
     Args:
         root: Root directory path
         pattern: Regex pattern to match
         include_hidden: Whether to include hidden files (default False)
+        stats: If given, filled with (mtime_ns, size) of returned files, taken
+            before their content was read (for change detection). Files
+            modified within RACY_WINDOW_NS are left out.
 
     Returns:
         Dict mapping file paths to their contents
     """
-    root_path = Path(root) if isinstance(root, str) else root
-    if not root_path.exists():
-        raise ValueError(f"Path does not exist: {root}")
-    if not root_path.is_dir():
-        raise ValueError(f"Path is not a directory: {root}")
+    root_path = _check_root(root)
 
     try:
         regex = re.compile(pattern, re.IGNORECASE)
     except re.error as e:
         raise ValueError(f"Invalid regex pattern: {e}") from e
 
+    def read_match(entry: os.DirEntry) -> tuple[str, os.stat_result] | None:
+        read = _read_text(entry.path)
+        if read is not None and read[0] is not None and regex.search(read[0]):
+            return read
+        return None
+
+    entries = list(_iter_files(str(root_path), include_hidden))
+
     results: dict[str, str] = {}
-    visited: set[str] = set()
+    with ThreadPoolExecutor() as executor:
+        for entry, read in zip(entries, executor.map(read_match, entries), strict=True):
+            if read is not None:
+                results[entry.path] = read[0]
+                if stats is not None:
+                    _record_stat(stats, entry.path, read[1])
 
-    for dirpath, dirnames, filenames in os.walk(str(root_path), followlinks=False):
-        # Resolve to catch symlink loops
-        try:
-            real_path = os.path.realpath(dirpath)
-            if real_path in visited:
-                dirnames.clear()  # Don't descend
-                continue
-            visited.add(real_path)
-        except OSError:
-            dirnames.clear()
-            continue
+    return results
 
-        # Filter directories in-place
-        dirnames[:] = [
-            d
-            for d in dirnames
-            if d not in IGNORED_DIRS and (include_hidden or not d.startswith("."))
-        ]
 
-        for filename in filenames:
-            # Skip hidden files unless flag set
-            if not include_hidden and filename.startswith("."):
-                continue
+def scan_metadata(root: str | Path, include_hidden: bool = False) -> dict[str, tuple[int, int]]:
+    """
+    List candidate files with their mtime and size, without reading contents.
 
-            # Skip binary extensions
-            _, ext = os.path.splitext(filename)
-            if ext.lower() in BINARY_EXTENSIONS:
-                continue
+    Uses the same filters as scan() except content checks (binary, UTF-8),
+    so it may include files that scan() would skip. Empty files are left
+    out, as scan() never matches them.
 
-            # Skip lock files by pattern
-            if filename.endswith("-lock.json"):
-                continue
+    Args:
+        root: Root directory path
+        include_hidden: Whether to include hidden files (default False)
 
-            filepath = os.path.join(dirpath, filename)
+    Returns:
+        Dict mapping file paths to (mtime_ns, size)
+    """
+    root_path = _check_root(root)
 
-            try:
-                # Skip large files
-                if os.path.getsize(filepath) > MAX_FILE_SIZE:
-                    continue
+    results: dict[str, tuple[int, int]] = {}
+    for entry in _iter_files(str(root_path), include_hidden):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        if st.st_size == 0 or st.st_size > MAX_FILE_SIZE:
+            continue
+        results[entry.path] = (st.st_mtime_ns, st.st_size)
 
-                # Read and check content
-                with open(filepath, "rb") as f:
-                    content_bytes = f.read()
+    return results
 
-                # Skip binary files
-                if _is_binary_content(content_bytes):
-                    continue
 
-                # Decode as UTF-8
-                try:
-                    content = content_bytes.decode("utf-8")
-                except UnicodeDecodeError:
-                    continue
+def read_files(
+    paths: Iterable[str], stats: dict[str, tuple[int, int]] | None = None
+) -> dict[str, str]:
+    """
+    Read specific files with the same content checks as scan().
+
+    Used after scan_metadata() to read only files that may have changed.
+    Unreadable, binary, and non-UTF-8 files are left out of the result.
+
+    Args:
+        paths: File paths to read
+        stats: If given, filled as in scan(). Binary and non-UTF-8 files get
+            an entry too, so callers can record them as not indexable.
 
-                # Match pattern
-                if regex.search(content):
-                    results[filepath] = content
+    Returns:
+        Dict mapping file paths to their contents
+    """
+    paths = list(paths)
 
-            except (OSError, PermissionError):
+    results: dict[str, str] = {}
+    with ThreadPoolExecutor() as executor:
+        for path, read in zip(paths, executor.map(_read_text, paths), strict=True):
+            if read is None:
                 continue
+            if read[0] is not None:
+                results[path] = read[0]
+            if stats is not None:
+                _record_stat(stats, path, read[1])
 
     return results
@@ -1,12 +1,24 @@
 """Semantic search using embeddings + omendb vector database."""
 
 import hashlib
-import json
+import multiprocessing
 import os
-from collections.abc import Callable
+import sqlite3
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-from .embedder import DIMENSIONS, Embedder
+import numpy as np
+import orjson
+
+from .embedder import (
+    DIMENSIONS,
+    DOCUMENT_PREFIX,
+    MAX_LENGTH,
+    MODEL_FILE,
+    MODEL_REPO,
+    Embedder,
+)
 from .extractor import ContextExtractor
 
 # Try to import omendb
@@ -21,8 +33,93 @@ except ImportError:
 INDEX_DIR = ".hhg"
 VECTORS_DIR = "vectors"
 MANIFEST_FILE = "manifest.json"
+EMBED_CACHE_FILE = "embed_cache.db"
 MANIFEST_VERSION = 3  # v3: relative paths
 
+# Below this much content, process pool startup (~0.2s) costs more than it
+# saves: in-process extraction of typical source runs at ~6MB/s
+PARALLEL_EXTRACT_MIN_BYTES = 2_000_000
+EXTRACT_CHUNKSIZE = 8  # Files per worker task (amortizes IPC)
+
+# Process-local extractor for worker processes (parsers aren't picklable)
+_worker_extractor: ContextExtractor | None = None
+
+
+def _content_hash(content: str) -> str:
+    """Hash file content for change detection."""
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def _stat_fields(stat: tuple[int, int] | None) -> dict:
+    """Get {"mtime_ns", "size"} for a manifest entry, or {} if no trusted stat."""
+    if stat is None:
+        return {}
+    mtime_ns, size = stat
+    return {"mtime_ns": mtime_ns, "size": size}
+
+
+def _stat_unchanged(file_entry: dict, file_path: str) -> bool:
+    """Check if file's mtime and size match its manifest entry (skips hashing)."""
+    if "mtime_ns" not in file_entry:
+        return False
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return False
+    return st.st_mtime_ns == file_entry["mtime_ns"] and st.st_size == file_entry.get("size")
+
+
+def _has_content(file_entry: dict | str) -> bool:
+    """Check if a manifest entry is for indexed content, not an unindexable file's stat."""
+    return not isinstance(file_entry, dict) or "hash" in file_entry
+
+
+def _refresh_stat(file_entry: dict, stat: tuple[int, int] | None) -> bool:
+    """Update entry's stat info after confirming content by hash. Returns True if changed."""
+    fields = _stat_fields(stat)
+    if not fields or all(file_entry.get(k) == v for k, v in fields.items()):
+        return False
+    file_entry.update(fields)
+    return True
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (respects affinity masks, unlike os.cpu_count)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _extract_pool() -> ProcessPoolExecutor:
+    """Process pool for block extraction.
+
+    Workers are never forked from this process: by the time extraction runs,
+    ONNX Runtime may have started threads, and forking a multi-threaded
+    process can deadlock. forkserver (or spawn where unavailable) starts
+    workers from a clean, single-threaded process.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=_available_cpus(), mp_context=multiprocessing.get_context(method)
+    )
+
+
+def _extract_worker(args: tuple[str, str]) -> list[dict] | None:
+    """Extract code blocks from one file in a worker process.
+
+    Returns:
+        List of blocks, or None if extraction failed.
+    """
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = ContextExtractor()
+
+    file_path, content = args
+    try:
+        return _worker_extractor.extract(file_path, query="", content=content)
+    except Exception:
+        return None
+
 
 def find_index_root(search_path: Path) -> tuple[Path, Path | None]:
     """Walk up directory tree to find existing index.
@@ -106,6 +203,73 @@ def find_subdir_indexes(path: Path) -> list[Path]:
     return indexes
 
 
+class EmbeddingCache:
+    """Persistent embedding cache keyed by block text hash (SQLite).
+
+    Lets re-indexing an edited file skip inference for blocks whose text
+    didn't change, including blocks moved between files. Entries are removed
+    once no indexed block uses them (see SemanticIndex._prune_embed_cache).
+    """
+
+    # Keys include everything embed() applies (model, dimensions, truncation,
+    # document prefix), so changing any of them never returns stale vectors
+    _KEY_PREFIX = (
+        f"{MODEL_REPO}/{MODEL_FILE}:{DIMENSIONS}:{MAX_LENGTH}:{DOCUMENT_PREFIX}\0".encode()
+    )
+    # Stored as the database's user_version: entries keyed under another
+    # prefix can never be hit again, so they're dropped on open
+    _KEY_VERSION = int(hashlib.sha256(_KEY_PREFIX).hexdigest()[:7], 16)
+    _MAX_VARS = 500  # Stay under SQLite's bound-parameter limit
+
+    def __init__(self, path: Path):
+        # Indexing embeds (and touches the cache) in a worker thread; access is
+        # still one thread at a time, so sharing the connection is safe
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != self._KEY_VERSION:
+            with self._conn:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.execute(f"PRAGMA user_version = {self._KEY_VERSION}")
+
+    @classmethod
+    def key(cls, text: str) -> str:
+        """Cache key for a block text."""
+        return hashlib.sha256(cls._KEY_PREFIX + text.encode()).hexdigest()[:16]
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Look up cached embeddings. Missing keys are absent from the result."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), self._MAX_VARS):
+            chunk = unique[i : i + self._MAX_VARS]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, keys: list[str], embeddings: np.ndarray) -> None:
+        """Store embeddings (rows of a float32 array) under the given keys."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                zip(keys, (row.tobytes() for row in embeddings), strict=True),
+            )
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove cached embeddings. Keys that aren't cached are ignored."""
+        with self._conn:
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", ((k,) for k in keys))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
 class SemanticIndex:
     """Manages semantic search index using omendb."""
 
@@ -132,6 +296,7 @@ class SemanticIndex:
         self.index_dir = self.root / INDEX_DIR
         self.vectors_path = str(self.index_dir / VECTORS_DIR)
         self.manifest_path = self.index_dir / MANIFEST_FILE
+        self.embed_cache_path = self.index_dir / EMBED_CACHE_FILE
 
         # Search scope for filtering results (relative to root)
         self.search_scope: str | None = None
@@ -147,6 +312,7 @@ class SemanticIndex:
         self.extractor = ContextExtractor()
 
         self._db: "omendb.Database | None" = None
+        self._embed_cache: EmbeddingCache | None = None
 
     def _to_relative(self, abs_path: str) -> str:
         """Convert absolute path to relative (for storage)."""
@@ -168,10 +334,60 @@ class SemanticIndex:
             self._db = omendb.open(self.vectors_path, dimensions=DIMENSIONS)
         return self._db
 
-    def _file_hash(self, path: Path) -> str:
-        """Get hash of file content for change detection."""
-        content = path.read_bytes()
-        return hashlib.sha256(content).hexdigest()[:16]
+    def _ensure_embed_cache(self) -> EmbeddingCache:
+        """Open or create the embedding cache."""
+        if self._embed_cache is None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._embed_cache = EmbeddingCache(self.embed_cache_path)
+        return self._embed_cache
+
+    def _embed_cached(self, texts: list[str]) -> np.ndarray:
+        """Embed texts, reusing cached embeddings for previously seen or repeated texts."""
+        cache = self._ensure_embed_cache()
+        keys = [EmbeddingCache.key(t) for t in texts]
+        cached = cache.get_many(keys)
+
+        embeddings = np.empty((len(texts), DIMENSIONS), dtype=np.float32)
+
+        # Duplicate texts (boilerplate, generated code) are embedded once
+        missing: dict[str, int] = {}  # key -> index into unique_texts
+        unique_texts = []
+        positions = []  # Rows of embeddings to fill from new embeddings
+        inverse = []  # Index into unique_texts for each of those rows
+        for j, key in enumerate(keys):
+            if key in cached:
+                embeddings[j] = cached[key]
+                continue
+            if key not in missing:
+                missing[key] = len(unique_texts)
+                unique_texts.append(texts[j])
+            positions.append(j)
+            inverse.append(missing[key])
+
+        if unique_texts:
+            new_embeddings = self.embedder.embed(unique_texts)
+            embeddings[positions] = new_embeddings[inverse]
+            cache.put_many(list(missing), new_embeddings)
+
+        return embeddings
+
+    def _prune_embed_cache(self, manifest: dict, dropped: list[dict]) -> None:
+        """Remove cached embeddings of dropped manifest entries that no remaining entry uses."""
+        unused = {key for entry in dropped for key in entry.get("keys", [])}
+        if not unused:
+            return
+        for file_entry in manifest["files"].values():
+            if isinstance(file_entry, dict):
+                unused.difference_update(file_entry.get("keys", []))
+        if unused:
+            self._ensure_embed_cache().delete_many(unused)
+
+    def _extract(self, file_path: str, content: str) -> list[dict] | None:
+        """Extract code blocks in-process. Returns None if extraction failed."""
+        try:
+            return self.extractor.extract(file_path, query="", content=content)
+        except Exception:
+            return None
 
     def _load_manifest(self) -> dict:
         """Load manifest of indexed files.
@@ -179,10 +395,15 @@ class SemanticIndex:
         Manifest format v3:
             {"version": 3, "files": {"rel/path": {"hash": "abc123", "blocks": ["id1", "id2"]}}}
 
+        Entries may also have "keys" (embedding cache key per block) and
+        "mtime_ns" and "size". When both still match the
+        file on disk, change detection skips reading and hashing it. Files that
+        can't be indexed (binary, not UTF-8) have entries with only these two.
+
         Migrates from older formats on load.
         """
         if self.manifest_path.exists():
-            data = json.loads(self.manifest_path.read_text())
+            data = orjson.loads(self.manifest_path.read_bytes())
             version = data.get("version", 1)
             files = data.get("files", {})
 
@@ -212,13 +433,14 @@ class SemanticIndex:
 
     def _save_manifest(self, manifest: dict) -> None:
         """Save manifest."""
-        self.manifest_path.write_text(json.dumps(manifest, indent=2))
+        self.manifest_path.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
 
     def index(
         self,
         files: dict[str, str],
         batch_size: int = 128,
         on_progress: Callable[[int, int, str], None] | None = None,
+        file_stats: dict[str, tuple[int, int]] | None = None,
     ) -> dict:
         """Index code files for semantic search.
 
@@ -226,6 +448,9 @@ class SemanticIndex:
             files: Dict mapping file paths to content.
             batch_size: Number of code blocks to embed at once.
             on_progress: Callback(current, total, message) for progress updates.
+            file_stats: (mtime_ns, size) per file, taken before its content was
+                read (see scanner.scan). Stored so later checks can skip
+                unchanged files; files without one are hashed next time.
 
         Returns:
             Stats dict with counts.
@@ -235,18 +460,22 @@ class SemanticIndex:
 
         stats = {"files": 0, "blocks": 0, "skipped": 0, "errors": 0, "deleted": 0}
 
-        # Collect all code blocks
-        all_blocks = []
-        files_to_update = {}  # Track which files we're updating
+        file_stats = file_stats or {}
+
+        # Phase 1: Hash and skip unchanged files
+        to_extract = []  # (file_path, rel_path, file_hash, content)
+        replaced = []  # Manifest entries of changed files (for cache pruning)
+        refreshed = False  # Stat info updated for unchanged files
 
         for file_path, content in files.items():
             # Convert to relative path for storage
             rel_path = self._to_relative(file_path)
-            file_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
+            file_hash = _content_hash(content)
 
             # Skip unchanged files (check by relative path)
             file_entry = manifest["files"].get(rel_path, {})
             if isinstance(file_entry, dict) and file_entry.get("hash") == file_hash:
+                refreshed |= _refresh_stat(file_entry, file_stats.get(file_path))
                 stats["skipped"] += 1
                 continue
 
@@ -255,69 +484,104 @@ class SemanticIndex:
             if old_blocks:
                 db.delete(old_blocks)
                 stats["deleted"] += len(old_blocks)
-
-            # Extract code blocks (use original path for extraction)
+            if isinstance(file_entry, dict):
+                replaced.append(file_entry)
+
+            to_extract.append((file_path, rel_path, file_hash, content))
+
+        # Phase 2: Extract code blocks (use original path for extraction)
+        work = [(file_path, content) for file_path, _, _, content in to_extract]
+        extracted = None
+        if (
+            _available_cpus() > 1
+            and sum(len(content) for _, content in work) >= PARALLEL_EXTRACT_MIN_BYTES
+        ):
             try:
-                blocks = self.extractor.extract(file_path, query="", content=content)
-                new_block_ids = []
-                for block in blocks:
-                    # Use relative path in block ID for portability
-                    block_id = f"{rel_path}:{block['start_line']}:{block['name']}"
-                    new_block_ids.append(block_id)
-                    all_blocks.append(
-                        {
-                            "id": block_id,
-                            "file": rel_path,  # Store relative path
-                            "file_hash": file_hash,
-                            "block": block,
-                            "text": f"{block['type']} {block['name']}\n{block['content']}",
-                        }
+                with _extract_pool() as executor:
+                    extracted = list(
+                        executor.map(_extract_worker, work, chunksize=EXTRACT_CHUNKSIZE)
                     )
-                files_to_update[rel_path] = {"hash": file_hash, "blocks": new_block_ids}
-                stats["files"] += 1
-            except Exception:
+            except (OSError, RuntimeError):
+                # Workers couldn't start (e.g. caller's script has no __main__ guard)
+                extracted = None
+        if extracted is None:
+            extracted = [self._extract(file_path, content) for file_path, content in work]
+
+        # Collect all code blocks as parallel lists (one pass, sliced per batch below)
+        block_ids: list[str] = []
+        texts: list[str] = []
+        metadatas: list[dict] = []
+        files_to_update = {}  # Track which files we're updating
+
+        for (file_path, rel_path, file_hash, _), blocks in zip(to_extract, extracted, strict=True):
+            if blocks is None:
                 stats["errors"] += 1
                 continue
 
-        if not all_blocks:
-            return stats
-
-        # Batch embed and store
-        total = len(all_blocks)
-        for i in range(0, total, batch_size):
-            batch = all_blocks[i : i + batch_size]
-            texts = [b["text"] for b in batch]
-
-            if on_progress:
-                on_progress(i, total, f"Embedding {len(batch)} blocks...")
-
-            # Generate embeddings
-            embeddings = self.embedder.embed(texts)
-
-            # Store in omendb
-            items = []
-            for j, block_info in enumerate(batch):
-                items.append(
+            new_block_ids = []
+            new_keys = []
+            for block in blocks:
+                # Use relative path in block ID for portability
+                block_id = f"{rel_path}:{block['start_line']}:{block['name']}"
+                new_block_ids.append(block_id)
+                text = f"{block['type']} {block['name']}\n{block['content']}"
+                texts.append(text)
+                new_keys.append(EmbeddingCache.key(text))
+                metadatas.append(
                     {
-                        "id": block_info["id"],
-                        "vector": embeddings[j].tolist(),
-                        "metadata": {
-                            "file": block_info["file"],
-                            "type": block_info["block"]["type"],
-                            "name": block_info["block"]["name"],
-                            "start_line": block_info["block"]["start_line"],
-                            "end_line": block_info["block"]["end_line"],
-                            "content": block_info["block"]["content"],
-                        },
+                        "file": rel_path,  # Store relative path
+                        "type": block["type"],
+                        "name": block["name"],
+                        "start_line": block["start_line"],
+                        "end_line": block["end_line"],
+                        "content": block["content"],
                     }
                 )
+            block_ids.extend(new_block_ids)
+            files_to_update[rel_path] = {
+                "hash": file_hash,
+                "blocks": new_block_ids,
+                "keys": new_keys,
+                **_stat_fields(file_stats.get(file_path)),
+            }
+            stats["files"] += 1
+
+        if not block_ids:
+            if refreshed:
+                self._save_manifest(manifest)
+            return stats
 
-            db.set(items)
-            stats["blocks"] += len(batch)
+        # Sort all blocks by text length so each embedding batch pads to a similar
+        # length (vectors are stored by ID, so the order doesn't matter)
+        order = sorted(range(len(texts)), key=lambda j: len(texts[j]), reverse=True)
+        block_ids = [block_ids[j] for j in order]
+        texts = [texts[j] for j in order]
+        metadatas = [metadatas[j] for j in order]
+
+        # Batch embed and store, pipelined: batch N+1 is embedded in a worker
+        # thread while batch N is stored (ONNX Runtime releases the GIL)
+        total = len(block_ids)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # Generate embeddings (only for texts not already cached)
+            pending = pool.submit(self._embed_cached, texts[:batch_size])
+            for i in range(0, total, batch_size):
+                end = min(i + batch_size, total)
+
+                if on_progress:
+                    on_progress(i, total, f"Embedding {end - i} blocks...")
+
+                embeddings = pending.result()
+                if end < total:
+                    pending = pool.submit(self._embed_cached, texts[end : end + batch_size])
+
+                # Store in omendb (contiguous float32 array, no per-vector Python lists)
+                db.set(ids=block_ids[i:end], vectors=embeddings, metadatas=metadatas[i:end])
+                stats["blocks"] += end - i
 
         # Update manifest with new file entries
         for file_path, file_info in files_to_update.items():
             manifest["files"][file_path] = file_info
+        self._prune_embed_cache(manifest, replaced)
 
         if on_progress:
             on_progress(total, total, "Done")
@@ -392,35 +656,114 @@ class SemanticIndex:
                 total += len(file_info.get("blocks", []))
         return total
 
-    def get_stale_files(self, files: dict[str, str]) -> tuple[list[str], list[str]]:
+    def get_stale_files(
+        self,
+        files: dict[str, str],
+        paths: list[str] | None = None,
+        file_stats: dict[str, tuple[int, int]] | None = None,
+    ) -> tuple[list[str], list[str]]:
         """Find files that need reindexing.
 
+        Files whose mtime and size match the manifest are not hashed. Files
+        that only look changed (e.g. touched) are hashed, and their stat info
+        is refreshed in the manifest so the next check is fast again.
+
         Args:
             files: Dict mapping file paths (absolute) to content.
+            paths: Paths that files was read from, if only some files were read
+                (see get_stale_paths). Only these are checked for deletion:
+                indexed ones missing from files (e.g. now binary) are deleted.
+                Others with stat info are recorded as not indexable, so they
+                are not read again until they change.
+            file_stats: Stat info taken before files were read (see index()),
+                used to refresh entries of files whose content is unchanged.
 
         Returns:
-            Tuple of (changed_files, deleted_files) - original paths from input.
+            Tuple of (changed_files, deleted_files) - changed are original paths
+            from input, deleted are relative paths from the manifest.
         """
         manifest = self._load_manifest()
-        indexed_files = manifest.get("files", {})
+        indexed_files = manifest.setdefault("files", {})
 
         # Build mapping of relative -> original path
         rel_to_orig = {self._to_relative(p): p for p in files.keys()}
 
+        file_stats = file_stats or {}
         changed = []
+        refreshed = False
         for file_path, content in files.items():
             rel_path = self._to_relative(file_path)
-            file_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
             file_entry = indexed_files.get(rel_path, {})
+            if isinstance(file_entry, dict) and _stat_unchanged(file_entry, file_path):
+                continue
+
             stored_hash = file_entry.get("hash") if isinstance(file_entry, dict) else file_entry
-            if stored_hash != file_hash:
+            if stored_hash != _content_hash(content):
                 changed.append(file_path)  # Return original path
+            elif isinstance(file_entry, dict):
+                refreshed |= _refresh_stat(file_entry, file_stats.get(file_path))
+
+        if paths is not None:
+            # Partial read: checked paths that didn't yield content = deleted
+            deleted = []
+            for p in paths:
+                if p in files:
+                    continue
+                rel_path = self._to_relative(p)
+                if rel_path in indexed_files and _has_content(indexed_files[rel_path]):
+                    deleted.append(rel_path)
+                elif p in file_stats:
+                    # Binary or not UTF-8: keep only the stat, so it drops out of
+                    # get_stale_paths() until it changes
+                    indexed_files[rel_path] = _stat_fields(file_stats[p])
+                    refreshed = True
+        else:
+            # Files in manifest but not in current scan = deleted
+            current_rel_files = set(rel_to_orig.keys())
+            deleted = [
+                f
+                for f, entry in indexed_files.items()
+                if f not in current_rel_files and _has_content(entry)
+            ]
+
+        if refreshed:
+            self._save_manifest(manifest)
+
+        return changed, deleted
+
+    def get_stale_paths(self, metadata: dict[str, tuple[int, int]]) -> tuple[list[str], list[str]]:
+        """Find files that may need reindexing, from stat info alone.
+
+        Lets callers skip reading file contents when nothing has changed.
+        Candidates still need a hash check (see get_stale_files): a touched
+        file shows up here even if its content is the same.
+
+        Args:
+            metadata: Dict mapping file paths (absolute) to (mtime_ns, size),
+                as returned by scanner.scan_metadata().
+
+        Returns:
+            Tuple of (candidate_files, deleted_files) - candidates are original
+            paths from input, deleted are relative paths from the manifest.
+        """
+        indexed_files = self._load_manifest().get("files", {})
+
+        candidates = []
+        current_rel_files = set()
+        for file_path, (mtime_ns, size) in metadata.items():
+            rel_path = self._to_relative(file_path)
+            current_rel_files.add(rel_path)
+            file_entry = indexed_files.get(rel_path)
+            if (
+                not isinstance(file_entry, dict)
+                or file_entry.get("mtime_ns") != mtime_ns
+                or file_entry.get("size") != size
+            ):
+                candidates.append(file_path)
 
-        # Files in manifest but not in current scan = deleted
-        current_rel_files = set(rel_to_orig.keys())
         deleted = [f for f in indexed_files if f not in current_rel_files]
 
-        return changed, deleted
+        return candidates, deleted
 
     def needs_update(self, files: dict[str, str]) -> int:
         """Quick check: how many files need updating?"""
@@ -431,17 +774,28 @@ class SemanticIndex:
         self,
         files: dict[str, str],
         on_progress: Callable[[int, int, str], None] | None = None,
+        deleted: list[str] | None = None,
+        file_stats: dict[str, tuple[int, int]] | None = None,
     ) -> dict:
         """Incremental update - only reindex changed files.
 
         Args:
-            files: Dict mapping file paths to content (all files).
+            files: Dict mapping file paths to content (all files, or only the
+                changed ones from get_stale_files() when deleted is given).
             on_progress: Callback for progress updates.
+            deleted: Relative paths known to be gone. When given, files were
+                already checked: they are re-indexed without another staleness
+                check (index() still skips any whose hash matches), and files
+                missing from it are kept.
+            file_stats: Stat info taken before files were read (see index()).
 
         Returns:
             Stats dict with counts.
         """
-        changed, deleted = self.get_stale_files(files)
+        if deleted is None:
+            changed, deleted = self.get_stale_files(files, file_stats=file_stats)
+        else:
+            changed = list(files)
 
         if not changed and not deleted:
             return {"files": 0, "blocks": 0, "deleted": 0, "skipped": len(files)}
@@ -452,18 +806,22 @@ class SemanticIndex:
         # Delete vectors for deleted files
         deleted_count = 0
         if deleted:
+            dropped = []
             for f in deleted:
-                file_entry = manifest["files"].get(f, {})
-                old_blocks = file_entry.get("blocks", []) if isinstance(file_entry, dict) else []
+                file_entry = manifest["files"].pop(f, {})
+                if not isinstance(file_entry, dict):
+                    continue
+                old_blocks = file_entry.get("blocks", [])
                 if old_blocks:
                     db.delete(old_blocks)
                     deleted_count += len(old_blocks)
-                manifest["files"].pop(f, None)
+                dropped.append(file_entry)
+            self._prune_embed_cache(manifest, dropped)
             self._save_manifest(manifest)
 
         # Re-index changed files (index() handles deleting old vectors)
         changed_files = {f: files[f] for f in changed if f in files}
-        stats = self.index(changed_files, on_progress=on_progress)
+        stats = self.index(changed_files, on_progress=on_progress, file_stats=file_stats)
         stats["deleted"] = stats.get("deleted", 0) + deleted_count
 
         return stats
@@ -472,6 +830,10 @@ class SemanticIndex:
         """Delete the index."""
         import shutil
 
+        self._db = None
+        if self._embed_cache is not None:
+            self._embed_cache.close()
+            self._embed_cache = None
         if self.index_dir.exists():
             shutil.rmtree(self.index_dir)
 
@@ -502,7 +864,7 @@ class SemanticIndex:
         if not subdir_manifest_path.exists():
             return {"merged": 0, "error": "no manifest"}
 
-        subdir_manifest = json.loads(subdir_manifest_path.read_text())
+        subdir_manifest = orjson.loads(subdir_manifest_path.read_bytes())
         subdir_files = subdir_manifest.get("files", {})
 
         # Open subdir database
@@ -562,6 +924,8 @@ class SemanticIndex:
                 manifest["files"][parent_rel_path] = {
                     "hash": file_info.get("hash", ""),
                     "blocks": new_block_ids,
+                    # Same file on disk, so stat info carries over
+                    **{k: file_info[k] for k in ("mtime_ns", "size") if k in file_info},
                 }
                 stats["files"] += 1
 
@@ -1,68 +1,135 @@
 """Test CLI module."""
 
-import json
+import atexit
+import io
 import os
+import shutil
 import sys
 import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager, redirect_stderr
+from pathlib import Path
+from unittest import mock
 
-sys.path.insert(0, os.path.join(os.getcwd(), "src"))
+import orjson
 
-import contextlib
+sys.path.insert(0, os.path.join(os.getcwd(), "src"))
 
 from hygrep import cli
 
 
+@contextmanager
+def capture_stdout_bytes() -> Iterator[io.BytesIO]:
+    """Capture stdout as UTF-8 bytes (read the yielded buffer after the block)."""
+    buf = io.BytesIO()
+    wrapper = io.TextIOWrapper(buf, encoding="utf-8", write_through=True)
+    old_stdout = sys.stdout
+    sys.stdout = wrapper
+    try:
+        yield buf
+    finally:
+        sys.stdout = old_stdout
+        wrapper.detach()  # Flush and release buf without closing it
+
+
+def write_files(root: str, files: dict[str, str]) -> dict[str, Path]:
+    """Write {relative name: content} files under root, returning their paths."""
+    paths = {name: Path(root) / name for name in files}
+    for name, path in paths.items():
+        path.write_text(files[name])
+    return paths
+
+
+def run_cli(argv: list[str]) -> int:
+    """Run hhg in-process with explicit args (no sys.argv mutation), return exit code."""
+    return cli.main(argv, prog_name="hygrep")
+
+
+# Project with a built index, shared by tests that need one (building embeds
+# every block, so it's done once per run and copied into each test's tmpdir)
+SHARED_FILES = {
+    "auth.py": "def login(user, password):\n    # Authenticate user\n    return True\n",
+}
+_shared_index_dir: str | None = None
+
+
+def shared_index() -> str:
+    """Return the shared project dir, building its .hhg index on first use."""
+    global _shared_index_dir
+    if _shared_index_dir is None:
+        _shared_index_dir = tempfile.mkdtemp(prefix="hhg-test-")
+        atexit.register(shutil.rmtree, _shared_index_dir, ignore_errors=True)
+        # Mtimes outside the racy window are recorded by build, so searching or
+        # checking status of a copy finds it up to date without rewriting it
+        for path in write_files(_shared_index_dir, SHARED_FILES).values():
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        assert run_cli(["-q", "build", _shared_index_dir]) == 0
+    return _shared_index_dir
+
+
+def copy_shared_index(dst: str) -> None:
+    """Copy the shared project and its built .hhg index into dst."""
+    # copy2 keeps mtimes, so the copy's files match the manifest (no re-index)
+    shutil.copytree(shared_index(), dst, dirs_exist_ok=True)
+
+
+_reranker_warm = False
+
+
+def warm_reranker() -> None:
+    """Load and warm the shared reranker on first use (only --fast tests need it)."""
+    global _reranker_warm
+    if not _reranker_warm:
+        cli._get_reranker().warmup()
+        _reranker_warm = True
+
+
 def test_exit_codes():
     """Test grep-compatible exit codes."""
+    warm_reranker()
+
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def hello(): pass\n")
+        write_files(tmpdir, {"test.py": "def hello(): pass\n"})
 
         # Test match (exit 0)
-        sys.argv = ["hygrep", "-q", "--fast", "hello", tmpdir]
-        try:
-            cli.main()
-            raise AssertionError("Should have called sys.exit")
-        except SystemExit as e:
-            assert e.code == 0, f"Expected exit 0 on match, got {e.code}"
+        code = run_cli(["-q", "--fast", "hello", tmpdir])
+        assert code == 0, f"Expected exit 0 on match, got {code}"
 
         # Test no match (exit 1)
-        sys.argv = ["hygrep", "-q", "--fast", "nonexistent_xyz", tmpdir]
-        try:
-            cli.main()
-            raise AssertionError("Should have called sys.exit")
-        except SystemExit as e:
-            assert e.code == 1, f"Expected exit 1 on no match, got {e.code}"
+        code = run_cli(["-q", "--fast", "nonexistent_xyz", tmpdir])
+        assert code == 1, f"Expected exit 1 on no match, got {code}"
 
         # Test error (exit 2)
-        sys.argv = ["hygrep", "-q", "test", "/nonexistent/path"]
-        try:
-            cli.main()
-            raise AssertionError("Should have called sys.exit")
-        except SystemExit as e:
-            assert e.code == 2, f"Expected exit 2 on error, got {e.code}"
+        code = run_cli(["-q", "test", "/nonexistent/path"])
+        assert code == 2, f"Expected exit 2 on error, got {code}"
 
     print("Exit codes: PASS")
 
 
+def test_exit_message():
+    """Test a SystemExit carrying a message is printed and mapped to the error code."""
+    stderr = io.StringIO()
+    with mock.patch.object(cli, "app", side_effect=SystemExit("Aborted!")), redirect_stderr(stderr):
+        code = run_cli(["hello"])
+
+    assert code == 2, f"Expected exit 2 for a message, got {code}"
+    assert stderr.getvalue() == "Aborted!\n"
+
+    print("Exit message: PASS")
+
+
 def test_json_output(capsys=None):
     """Test JSON output format."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "auth.py")
-        with open(test_file, "w") as f:
-            f.write("def login(): pass\n")
+        write_files(tmpdir, {"auth.py": "def login(): pass\n"})
 
-        sys.argv = ["hygrep", "--json", "--fast", "-q", "login", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--json", "--fast", "-q", "login", tmpdir]) == 0
 
         out = stdout.getvalue()
-        results = json.loads(out)
+        results = orjson.loads(out)
         assert isinstance(results, list)
         assert len(results) > 0
         assert "file" in results[0]
@@ -74,29 +141,27 @@ def test_json_output(capsys=None):
 
 def test_exclude_patterns():
     """Test --exclude pattern filtering."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        with open(os.path.join(tmpdir, "main.py"), "w") as f:
-            f.write("def main(): pass\n")
-        with open(os.path.join(tmpdir, "test_main.py"), "w") as f:
-            f.write("def test_main(): pass\n")
+        write_files(
+            tmpdir,
+            {
+                "main.py": "def main(): pass\n",
+                "test_main.py": "def test_main(): pass\n",
+            },
+        )
 
         # Without exclude
-        sys.argv = ["hygrep", "--json", "--fast", "-q", "main", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
-        results = json.loads(stdout.getvalue())
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--json", "--fast", "-q", "main", tmpdir]) == 0
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 2, f"Expected >= 2 results, got {len(results)}"
 
         # With exclude
-        sys.argv = ["hygrep", "--json", "--fast", "-q", "--exclude", "test_*", "main", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
-        results = json.loads(stdout.getvalue())
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--json", "--fast", "-q", "--exclude", "test_*", "main", tmpdir]) == 0
+        results = orjson.loads(stdout.getvalue())
         # Should have fewer results after exclusion
         for r in results:
             assert "test_main" not in r["file"], f"test_main should be excluded: {r['file']}"
@@ -106,21 +171,15 @@ def test_exclude_patterns():
 
 def test_type_filter():
     """Test -t/--type file type filtering."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        with open(os.path.join(tmpdir, "code.py"), "w") as f:
-            f.write("def hello(): pass\n")
-        with open(os.path.join(tmpdir, "code.js"), "w") as f:
-            f.write("function hello() {}\n")
+        write_files(tmpdir, {"code.py": "def hello(): pass\n", "code.js": "function hello() {}\n"})
 
-        sys.argv = ["hygrep", "--json", "--fast", "-q", "-t", "py", "hello", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--json", "--fast", "-q", "-t", "py", "hello", tmpdir]) == 0
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 1, f"Expected >= 1 Python result, got {len(results)}"
         for r in results:
             assert r["file"].endswith(".py"), f"Expected .py file, got {r['file']}"
@@ -130,38 +189,25 @@ def test_type_filter():
 
 def test_help():
     """Test --help flag."""
-    import io
-    from contextlib import redirect_stdout
-
-    sys.argv = ["hygrep", "--help"]
-    stdout = io.StringIO()
-    with redirect_stdout(stdout):
-        try:
-            cli.main()
-        except SystemExit as e:
-            assert e.code == 0
+    with capture_stdout_bytes() as stdout:
+        assert run_cli(["--help"]) == 0
 
-    out = stdout.getvalue()
+    out = stdout.getvalue().decode()
     assert "hygrep" in out.lower()
     print("Help flag: PASS")
 
 
 def test_fast_mode():
     """Test --fast mode (grep + neural rerank)."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def hello(): pass\n")
+        write_files(tmpdir, {"test.py": "def hello(): pass\n"})
 
-        sys.argv = ["hygrep", "--fast", "--json", "-q", "hello", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--fast", "--json", "-q", "hello", tmpdir]) == 0
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 1
         # Fast mode uses reranking, so has scores > 0
         assert results[0]["score"] >= 0.0
@@ -171,21 +217,21 @@ def test_fast_mode():
 
 def test_files_only():
     """Test -l/--files-only option."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        with open(os.path.join(tmpdir, "a.py"), "w") as f:
-            f.write("def hello(): pass\ndef world(): pass\n")
-        with open(os.path.join(tmpdir, "b.py"), "w") as f:
-            f.write("def hello(): pass\n")
-
-        sys.argv = ["hygrep", "-l", "--fast", "-q", "hello", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
-
-        out = stdout.getvalue().strip()
+        write_files(
+            tmpdir,
+            {
+                "a.py": "def hello(): pass\ndef world(): pass\n",
+                "b.py": "def hello(): pass\n",
+            },
+        )
+
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["-l", "--fast", "-q", "hello", tmpdir]) == 0
+
+        out = stdout.getvalue().decode().strip()
         lines = [line for line in out.split("\n") if line]  # Filter empty lines
         # Should have unique files only
         assert len(lines) == len(set(lines)), "Files should be unique"
@@ -198,20 +244,15 @@ def test_files_only():
 
 def test_compact_json():
     """Test --compact option for JSON without content."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def hello(): pass\n")
+        write_files(tmpdir, {"test.py": "def hello(): pass\n"})
 
-        sys.argv = ["hygrep", "--json", "--compact", "--fast", "-q", "hello", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--json", "--compact", "--fast", "-q", "hello", tmpdir]) == 0
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 1
         # Compact should NOT have content
         assert "content" not in results[0], "Compact JSON should not have content"
@@ -225,20 +266,15 @@ def test_compact_json():
 
 def test_end_line_in_json():
     """Test that end_line is present in JSON output."""
-    import io
-    from contextlib import redirect_stdout
+    warm_reranker()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def hello():\n    pass\n    return True\n")
+        write_files(tmpdir, {"test.py": "def hello():\n    pass\n    return True\n"})
 
-        sys.argv = ["hygrep", "--json", "--fast", "-q", "hello", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["--json", "--fast", "-q", "hello", tmpdir]) == 0
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 1
         # CLI normalizes start_line -> line
         assert "line" in results[0], "Missing line"
@@ -249,101 +285,60 @@ def test_end_line_in_json():
 
 
 def test_semantic_mode():
-    """Test default semantic search mode (builds index automatically)."""
-    import io
-    import shutil
-    from contextlib import redirect_stdout
-
+    """Test default semantic search mode (on a built index)."""
     with tempfile.TemporaryDirectory() as tmpdir:
-        # Create test file
-        test_file = os.path.join(tmpdir, "auth.py")
-        with open(test_file, "w") as f:
-            f.write("def login(user, password):\n    # Authenticate user\n    return True\n")
-
-        # Remove any existing index
-        index_dir = os.path.join(tmpdir, ".hhg")
-        if os.path.exists(index_dir):
-            shutil.rmtree(index_dir)
-
-        # Build index first (required for semantic search)
-        sys.argv = ["hygrep", "-q", "build", tmpdir]
-        with contextlib.suppress(SystemExit):
-            cli.main()
-
-        assert os.path.exists(index_dir), "Index should be created by build"
+        copy_shared_index(tmpdir)
+        assert os.path.exists(os.path.join(tmpdir, ".hhg")), "Index should be copied"
 
         # Semantic search (default mode)
-        sys.argv = ["hygrep", "-q", "--json", "authentication", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["-q", "--json", "authentication", tmpdir]) == 0
 
-        out = stdout.getvalue()
-        results = json.loads(out)
-        assert len(results) >= 1, "Should find at least 1 result"
-        assert results[0]["name"] == "login", f"Expected 'login', got '{results[0]['name']}'"
+    out = stdout.getvalue()
+    results = orjson.loads(out)
+    assert len(results) >= 1, "Should find at least 1 result"
+    assert results[0]["name"] == "login", f"Expected 'login', got '{results[0]['name']}'"
 
     print("Semantic mode: PASS")
 
 
 def test_status_command():
     """Test 'hhg status' command."""
-    import io
-    from contextlib import redirect_stderr, redirect_stdout
-
     with tempfile.TemporaryDirectory() as tmpdir:
         # No index yet
-        sys.argv = ["hygrep", "status", tmpdir]
-        stdout = io.StringIO()
         stderr = io.StringIO()
-        with redirect_stdout(stdout), redirect_stderr(stderr), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout, redirect_stderr(stderr):
+            run_cli(["status", tmpdir])
 
-        out = stdout.getvalue() + stderr.getvalue()
+        out = stdout.getvalue().decode() + stderr.getvalue()
         assert "No index" in out or "not indexed" in out.lower() or "0" in out
 
-        # Create a file and index it
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def foo(): pass\n")
-
-        # Build index explicitly
-        sys.argv = ["hygrep", "-q", "build", tmpdir]
-        with redirect_stdout(io.StringIO()), contextlib.suppress(SystemExit):
-            cli.main()
-
-        # Now check status
-        sys.argv = ["hygrep", "status", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+    # Now check status of a built index
+    with tempfile.TemporaryDirectory() as tmpdir:
+        copy_shared_index(tmpdir)
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["status", tmpdir]) == 0
 
-        out = stdout.getvalue()
-        # Should show some indexed content
-        assert "1" in out or "block" in out.lower() or "file" in out.lower()
+    out = stdout.getvalue().decode()
+    # Should show some indexed content
+    assert "1" in out or "block" in out.lower() or "file" in out.lower()
+    assert "up to date" in out, f"Copied index should match its files: {out}"
 
     print("Status command: PASS")
 
 
 def test_build_command():
     """Test 'hhg build' command."""
-    import io
-    from contextlib import redirect_stdout
-
     with tempfile.TemporaryDirectory() as tmpdir:
-        # Create test file
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def hello(): pass\n")
+        # Smallest input that still builds (embedding cost scales with blocks)
+        write_files(tmpdir, {"test.py": "def f(): 1\n"})
 
         index_dir = os.path.join(tmpdir, ".hhg")
         assert not os.path.exists(index_dir), "Index should not exist yet"
 
         # Build index
-        sys.argv = ["hygrep", "-q", "build", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes():
+            assert run_cli(["-q", "build", tmpdir]) == 0
 
         # Index should exist now
         assert os.path.exists(index_dir), "Index should exist after build"
@@ -353,27 +348,15 @@ def test_build_command():
 
 def test_clean_command():
     """Test 'hhg clean' command."""
-    import io
-    from contextlib import redirect_stdout
-
     with tempfile.TemporaryDirectory() as tmpdir:
-        # Create test file and build index
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def hello(): pass\n")
-
-        sys.argv = ["hygrep", "-q", "build", tmpdir]
-        with redirect_stdout(io.StringIO()), contextlib.suppress(SystemExit):
-            cli.main()
+        copy_shared_index(tmpdir)
 
         index_dir = os.path.join(tmpdir, ".hhg")
         assert os.path.exists(index_dir), "Index should exist before clean"
 
         # Clean
-        sys.argv = ["hygrep", "clean", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes():
+            assert run_cli(["clean", tmpdir]) == 0
 
         assert not os.path.exists(index_dir), "Index should be removed after clean"
 
@@ -382,20 +365,13 @@ def test_clean_command():
 
 def test_exact_mode():
     """Test -e/--exact mode (grep without reranking)."""
-    import io
-    from contextlib import redirect_stdout
-
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def exact_match(): pass\n")
+        write_files(tmpdir, {"test.py": "def exact_match(): pass\n"})
 
-        sys.argv = ["hygrep", "-e", "--json", "-q", "exact_match", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["-e", "--json", "-q", "exact_match", tmpdir]) == 0
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 1
         assert results[0]["name"] == "exact_match"
         # Exact mode uses score 1.0 (all matches equal, no ranking)
@@ -406,21 +382,14 @@ def test_exact_mode():
 
 def test_regex_mode():
     """Test -r/--regex mode."""
-    import io
-    from contextlib import redirect_stdout
-
     with tempfile.TemporaryDirectory() as tmpdir:
-        test_file = os.path.join(tmpdir, "test.py")
-        with open(test_file, "w") as f:
-            f.write("def test_foo(): pass\ndef test_bar(): pass\n")
+        write_files(tmpdir, {"test.py": "def test_foo(): pass\ndef test_bar(): pass\n"})
 
         # Regex pattern matching test_*
-        sys.argv = ["hygrep", "-r", "--json", "-q", "test_.*", tmpdir]
-        stdout = io.StringIO()
-        with redirect_stdout(stdout), contextlib.suppress(SystemExit):
-            cli.main()
+        with capture_stdout_bytes() as stdout:
+            assert run_cli(["-r", "--json", "-q", "test_.*", tmpdir]) == 0
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 2, f"Expected >= 2 results, got {len(results)}"
 
     print("Regex mode: PASS")
@@ -429,6 +398,7 @@ def test_regex_mode():
 if __name__ == "__main__":
     print("Running CLI tests...\n")
     test_exit_codes()
+    test_exit_message()
     test_json_output()
     test_exclude_patterns()
     test_type_filter()
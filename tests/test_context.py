@@ -2,6 +2,7 @@
 
 import os
 import sys
+import tempfile
 
 sys.path.insert(0, os.path.join(os.getcwd(), "src"))
 
@@ -11,14 +12,14 @@ from hygrep.extractor import ContextExtractor
 def test_extraction():
     extractor = ContextExtractor()
 
-    # Create dummy file
-    dummy_path = "tests/dummy.py"
+    # Create dummy file (in a private tmpdir so parallel runs don't collide)
     code = "def hello():\n    print('Hello')\n\nclass World:\n    def greet(self):\n        pass\n"
 
-    with open(dummy_path, "w") as f:
-        f.write(code)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dummy_path = os.path.join(tmpdir, "dummy.py")
+        with open(dummy_path, "w") as f:
+            f.write(code)
 
-    try:
         blocks = extractor.extract(dummy_path, "hello")
         print(f"Found {len(blocks)} blocks:")
         for b in blocks:
@@ -26,10 +27,6 @@ def test_extraction():
 
         assert len(blocks) >= 1
 
-    finally:
-        if os.path.exists(dummy_path):
-            os.remove(dummy_path)
-
 
 if __name__ == "__main__":
     test_extraction()
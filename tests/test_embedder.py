@@ -1,6 +1,7 @@
 """Test embedder module."""
 
 import os
+import subprocess
 import sys
 
 import numpy as np
@@ -108,6 +109,37 @@ def test_embed_large_batch():
     print("Embed large batch: PASS")
 
 
+def test_embed_preserves_order():
+    """Test length-sorted batching returns embeddings in input order."""
+    embedder = Embedder()
+    # Mixed lengths across several batches
+    texts = [f"def f_{i}(): return {'x + ' * (i % 7)}1" for i in range(40)]
+
+    embeddings = embedder.embed(texts)
+
+    for i in (0, 5, 13, 39):
+        single = embedder.embed([texts[i]])[0]
+        assert np.dot(embeddings[i], single) > 0.99, f"Embedding {i} out of order"
+
+    print("Embed preserves order: PASS")
+
+
+def test_import_defers_onnxruntime():
+    """Test importing semantic/embedder doesn't load ONNX Runtime or HF hub."""
+    code = (
+        "import sys, hygrep.semantic, hygrep.reranker; "
+        "print([m for m in ('onnxruntime', 'tokenizers', 'huggingface_hub') "
+        "if m in sys.modules])"
+    )
+    env = {**os.environ, "PYTHONPATH": os.path.join(os.getcwd(), "src")}
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    assert result.stdout.strip() == "[]", f"Heavy modules imported: {result.stdout}"
+
+    print("Import defers onnxruntime: PASS")
+
+
 if __name__ == "__main__":
     print("Running embedder tests...\n")
     test_embedder_init()
@@ -116,4 +148,6 @@ if __name__ == "__main__":
     test_embed_empty()
     test_embed_similarity()
     test_embed_large_batch()
+    test_embed_preserves_order()
+    test_import_defers_onnxruntime()
     print("\nAll embedder tests passed!")
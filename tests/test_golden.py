@@ -7,13 +7,18 @@ Run: pixi run pytest tests/test_golden.py -v
 Or:  python tests/test_golden.py
 """
 
+import atexit
 import io
-import json
 import os
+import shutil
 import sys
-from contextlib import redirect_stdout, suppress
+import tempfile
+import traceback
+from contextlib import redirect_stdout
 from pathlib import Path
 
+import orjson
+
 sys.path.insert(0, os.path.join(os.getcwd(), "src"))
 
 from hygrep import cli
@@ -32,20 +37,19 @@ def run_search(
         path = str(GOLDEN_DIR)
 
     # Options must come BEFORE positional args in Typer CLI
-    args = ["hygrep", "--json", "-q", "-n", str(top_k)]
+    args = ["--json", "-q", "-n", str(top_k)]
     if fast:
         args.append("--fast")
     args.extend([query, path])
 
-    sys.argv = args
     stdout = io.StringIO()
-    with redirect_stdout(stdout), suppress(SystemExit):
-        cli.main()
+    with redirect_stdout(stdout):
+        cli.main(args)
 
     output = stdout.getvalue()
     if not output.strip():
         return []
-    return json.loads(output)
+    return orjson.loads(output)
 
 
 def result_contains(
@@ -152,14 +156,26 @@ class TestFastMode:
 # =============================================================================
 
 
-def _ensure_index_built():
-    """Build index for golden dir if not already built."""
-    index_dir = GOLDEN_DIR / ".hhg"
-    if not (index_dir / "manifest.json").exists():
+_golden_index_dir: str | None = None
+
+
+def _ensure_index_built() -> str:
+    """Build an index over a private copy of the golden dir, once per process.
+
+    Building in a copy keeps tests/golden/ untouched, so concurrent runs
+    (e.g. pytest -n auto) never share or race on one .hhg index.
+    """
+    global _golden_index_dir
+    if _golden_index_dir is None:
+        _golden_index_dir = tempfile.mkdtemp(prefix="hhg-golden-")
+        atexit.register(shutil.rmtree, _golden_index_dir, ignore_errors=True)
+        shutil.copytree(
+            GOLDEN_DIR, _golden_index_dir, ignore=shutil.ignore_patterns(".hhg"), dirs_exist_ok=True
+        )
+
         # Build index quietly
-        sys.argv = ["hygrep", "-q", "build", str(GOLDEN_DIR)]
-        with suppress(SystemExit):
-            cli.main()
+        cli.main(["-q", "build", _golden_index_dir])
+    return _golden_index_dir
 
 
 class TestReranking:
@@ -168,11 +184,11 @@ class TestReranking:
     @classmethod
     def setup_class(cls):
         """Build index before running semantic tests."""
-        _ensure_index_built()
+        cls.path = _ensure_index_built()
 
     def test_semantic_password_hash(self):
         """Semantic search for password hashing."""
-        results = run_search("how to hash passwords securely")
+        results = run_search("how to hash passwords securely", path=self.path)
         assert len(results) > 0, "Should find results"
         # hash_password should rank highly for this query
         top_names = [r.get("name") for r in results[:5]]
@@ -182,7 +198,7 @@ class TestReranking:
 
     def test_semantic_graceful_shutdown(self):
         """Semantic search for graceful shutdown."""
-        results = run_search("graceful server shutdown")
+        results = run_search("graceful server shutdown", path=self.path)
         # Should find server.go (Shutdown method or related code)
         assert result_contains(results[:5], "server.go"), (
             f"server.go should be in top 5: {get_result_names(results[:5])}"
@@ -190,14 +206,14 @@ class TestReranking:
 
     def test_semantic_error_handling(self):
         """Semantic search for error handling patterns."""
-        results = run_search("custom error types with context")
+        results = run_search("custom error types with context", path=self.path)
         assert result_contains(results[:5], "errors.rs"), (
             f"errors.rs should be in top 5: {get_result_names(results[:5])}"
         )
 
     def test_semantic_crud_operations(self):
         """Semantic search for CRUD operations."""
-        results = run_search("REST API CRUD handlers")
+        results = run_search("REST API CRUD handlers", path=self.path)
         assert result_contains(results[:5], "api_handlers.ts"), (
             f"api_handlers.ts should be in top 5: {get_result_names(results[:5])}"
         )
@@ -205,8 +221,8 @@ class TestReranking:
     def test_ranking_improves_results(self):
         """Reranking should improve result quality."""
         # Use specific function name to avoid file ordering issues
-        fast_results = run_search("validate_session", fast=True)
-        ranked_results = run_search("validate_session")
+        fast_results = run_search("validate_session", path=self.path, fast=True)
+        ranked_results = run_search("validate_session", path=self.path)
 
         # Both should find auth.py
         assert result_contains(fast_results, "auth.py"), "Fast mode should find auth.py"
@@ -218,7 +234,7 @@ class TestReranking:
 
     def test_scores_are_ordered(self):
         """Results should be ordered by score (descending)."""
-        results = run_search("HTTP server routing")
+        results = run_search("HTTP server routing", path=self.path)
         if len(results) > 1:
             scores = [r["score"] for r in results]
             assert scores == sorted(scores, reverse=True), f"Scores should be descending: {scores}"
@@ -241,12 +257,9 @@ class TestEdgeCases:
     def test_empty_query(self):
         """Empty query should show help or exit gracefully."""
         # Options must come BEFORE positional args in Typer CLI
-        sys.argv = ["hygrep", "--json", "-q", "--fast", "", str(GOLDEN_DIR)]
-        try:
-            cli.main()
-        except SystemExit as e:
-            # Exit 0 (help shown), 1 (no match), or 2 (error) are all acceptable
-            assert e.code in (0, 1, 2), f"Expected exit 0, 1, or 2, got {e.code}"
+        code = cli.main(["--json", "-q", "--fast", "", str(GOLDEN_DIR)])
+        # Exit 0 (help shown), 1 (no match), or 2 (error) are all acceptable
+        assert code in (0, 1, 2), f"Expected exit 0, 1, or 2, got {code}"
 
     def test_single_word_query(self):
         """Single word queries work."""
@@ -276,8 +289,6 @@ class TestEdgeCases:
 
 def run_tests():
     """Run all tests and report results."""
-    import traceback
-
     test_classes = [TestFastMode, TestReranking, TestEdgeCases]
     passed = 0
     failed = 0
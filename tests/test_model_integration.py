@@ -8,7 +8,10 @@ Not included in default test suite.
 import io
 import os
 import sys
-from contextlib import redirect_stderr, redirect_stdout, suppress
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+
+import orjson
 
 sys.path.insert(0, os.path.join(os.getcwd(), "src"))
 
@@ -33,26 +36,20 @@ def test_model_clean_and_install():
 
     # 3. Test 'hygrep model' shows not installed
     print("3. Testing 'hygrep model' output...")
-    sys.argv = ["hygrep", "model"]
     stdout = io.StringIO()
     with redirect_stdout(stdout):
-        try:
-            cli.main()
-        except SystemExit as e:
-            assert e.code == 1, f"Expected exit 1 (not installed), got {e.code}"
+        code = cli.main(["model"])
+    assert code == 1, f"Expected exit 1 (not installed), got {code}"
     out = stdout.getvalue()
     assert "Not installed" in out, f"Expected 'Not installed' in output: {out}"
     print("   Shows 'Not installed' (correct)")
 
     # 4. Install model
     print("4. Installing model (this downloads ~83MB)...")
-    sys.argv = ["hygrep", "model", "install"]
     stderr = io.StringIO()
     with redirect_stderr(stderr):
-        try:
-            cli.main()
-        except SystemExit as e:
-            assert e.code == 0, f"Expected exit 0 on install, got {e.code}"
+        code = cli.main(["model", "install"])
+    assert code == 0, f"Expected exit 0 on install, got {code}"
     err = stderr.getvalue()
     print(f"   {err.strip()}")
 
@@ -64,35 +61,27 @@ def test_model_clean_and_install():
 
     # 6. Test 'hygrep model' shows installed
     print("6. Testing 'hygrep model' output...")
-    sys.argv = ["hygrep", "model"]
     stdout = io.StringIO()
     with redirect_stdout(stdout):
-        try:
-            cli.main()
-        except SystemExit as e:
-            assert e.code == 0, f"Expected exit 0 (installed), got {e.code}"
+        code = cli.main(["model"])
+    assert code == 0, f"Expected exit 0 (installed), got {code}"
     out = stdout.getvalue()
     assert "Installed" in out, f"Expected 'Installed' in output: {out}"
     print("   Shows 'Installed' (correct)")
 
     # 7. Test search works
     print("7. Testing search with fresh model...")
-    import tempfile
-
     with tempfile.TemporaryDirectory() as tmpdir:
         test_file = os.path.join(tmpdir, "auth.py")
         with open(test_file, "w") as f:
             f.write("def login(): pass\n")
 
         # Use "login" as query to match file content
-        sys.argv = ["hygrep", "login", tmpdir, "--json", "-q"]
         stdout = io.StringIO()
-        with redirect_stdout(stdout), suppress(SystemExit):
-            cli.main()
-
-        import json
+        with redirect_stdout(stdout):
+            cli.main(["login", tmpdir, "--json", "-q"])
 
-        results = json.loads(stdout.getvalue())
+        results = orjson.loads(stdout.getvalue())
         assert len(results) >= 1, f"Expected results, got: {results}"
         print(f"   Search returned {len(results)} result(s)")
 
@@ -107,19 +96,14 @@ def test_model_install_force():
     info_before = get_model_info()
     if not info_before["installed"]:
         print("Model not installed, installing first...")
-        sys.argv = ["hygrep", "model", "install"]
-        with suppress(SystemExit):
-            cli.main()
+        cli.main(["model", "install"])
 
     # Force reinstall
     print("Running 'hygrep model install --force'...")
-    sys.argv = ["hygrep", "model", "install", "--force"]
     stderr = io.StringIO()
     with redirect_stderr(stderr):
-        try:
-            cli.main()
-        except SystemExit as e:
-            assert e.code == 0, f"Expected exit 0, got {e.code}"
+        code = cli.main(["model", "install", "--force"])
+    assert code == 0, f"Expected exit 0, got {code}"
 
     err = stderr.getvalue()
     assert "Downloading" in err, f"Expected download message: {err}"
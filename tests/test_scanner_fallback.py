@@ -3,10 +3,11 @@
 import os
 import sys
 import tempfile
+import traceback
 
 sys.path.insert(0, os.path.join(os.getcwd(), "src"))
 
-from hygrep.scanner import _is_binary_content, scan
+from hygrep.scanner import _is_binary_content, read_files, scan, scan_metadata
 
 
 class TestScannerBasics:
@@ -246,10 +247,79 @@ class TestUnicode:
             assert len(results) == 0
 
 
+class TestScanMetadata:
+    """Metadata-only scanning (no content reads)."""
+
+    def test_returns_mtime_and_size(self):
+        """Return (mtime_ns, size) for each candidate file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "test.py")
+            with open(filepath, "w") as f:
+                f.write("def hello(): pass\n")
+
+            results = scan_metadata(tmpdir)
+            st = os.stat(filepath)
+            assert results == {filepath: (st.st_mtime_ns, st.st_size)}
+
+    def test_same_filters_as_scan(self):
+        """Skip ignored dirs, hidden files, and binary extensions."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, "node_modules"))
+            for name in ("main.py", ".hidden", "image.png", "node_modules/lib.js"):
+                with open(os.path.join(tmpdir, name), "w") as f:
+                    f.write("hello\n")
+
+            results = scan_metadata(tmpdir)
+            assert set(results) == set(scan(tmpdir, "."))
+            assert [os.path.basename(p) for p in results] == ["main.py"]
+
+    def test_read_files_matches_scan(self):
+        """read_files() reads only the given paths, skipping binary and missing files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            text = os.path.join(tmpdir, "a.py")
+            other = os.path.join(tmpdir, "b.py")
+            binary = os.path.join(tmpdir, "data.txt")
+            with open(text, "w") as f:
+                f.write("def a(): pass\n")
+            with open(other, "w") as f:
+                f.write("def b(): pass\n")
+            with open(binary, "wb") as f:
+                f.write(b"\x00\x01\x02")
+
+            missing = os.path.join(tmpdir, "gone.py")
+            results = read_files([text, binary, missing])
+            assert results == {text: scan(tmpdir, ".")[text]}
+
+    def test_empty_files_skipped(self):
+        """Skip empty files, which scan() never matches."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            open(os.path.join(tmpdir, "__init__.py"), "w").close()
+            with open(os.path.join(tmpdir, "main.py"), "w") as f:
+                f.write("hello\n")
+
+            results = scan_metadata(tmpdir)
+            assert set(results) == set(scan(tmpdir, "."))
+            assert [os.path.basename(p) for p in results] == ["main.py"]
+
+    def test_read_files_stats_unindexable(self):
+        """read_files() reports stats of binary and non-UTF-8 files it leaves out."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            binary = os.path.join(tmpdir, "font.ttf")
+            latin1 = os.path.join(tmpdir, "notes.txt")
+            with open(binary, "wb") as f:
+                f.write(b"\x00\x01\x02")
+            with open(latin1, "wb") as f:
+                f.write("caf\u00e9\n".encode("latin-1"))
+            for path in (binary, latin1):
+                os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+            stats = {}
+            assert read_files([binary, latin1], stats=stats) == {}
+            assert stats == {binary: (1_000_000_000, 3), latin1: (1_000_000_000, 5)}
+
+
 def run_tests():
     """Run all tests."""
-    import traceback
-
     test_classes = [
         TestScannerBasics,
         TestIgnoredDirs,
@@ -259,6 +329,7 @@ def run_tests():
         TestSymlinks,
         TestPathValidation,
         TestUnicode,
+        TestScanMetadata,
     ]
 
     passed = 0
@@ -1,13 +1,27 @@
 """Test semantic search module."""
 
+import json
 import os
 import sys
 import tempfile
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from unittest import mock
+
+import numpy as np
 
 sys.path.insert(0, os.path.join(os.getcwd(), "src"))
 
-from hygrep.semantic import INDEX_DIR, MANIFEST_FILE, SemanticIndex, find_index_root
+from hygrep import semantic
+from hygrep.scanner import read_files, scan, scan_metadata
+from hygrep.semantic import (
+    EMBED_CACHE_FILE,
+    INDEX_DIR,
+    MANIFEST_FILE,
+    EmbeddingCache,
+    SemanticIndex,
+    find_index_root,
+)
 
 
 def test_find_index_root_no_existing():
@@ -176,6 +190,238 @@ def test_semantic_index_stale_detection():
     print("SemanticIndex stale detection: PASS")
 
 
+def test_semantic_index_stat_fast_path():
+    """Test mtime/size match skips hashing, and touched files get stat refreshed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir).resolve()
+
+        test_file = tmpdir / "test.py"
+        test_file.write_text("def foo(): pass\n")
+        # Age the file past the racy window so its stat info is trusted
+        os.utime(test_file, ns=(1_000_000_000, 1_000_000_000))
+
+        idx = SemanticIndex(tmpdir)
+        file_stats = {}
+        idx.index(read_files([str(test_file)], stats=file_stats), file_stats=file_stats)
+
+        entry = idx._load_manifest()["files"]["test.py"]
+        assert entry["mtime_ns"] == 1_000_000_000
+        assert entry["size"] == test_file.stat().st_size
+
+        # Stat matches: content isn't hashed, so a bogus content value is ignored
+        changed, _ = idx.get_stale_files({str(test_file): "not the real content"})
+        assert changed == [], "Stat match should skip hashing"
+
+        # Touched but unchanged: hashed, not stale, stat refreshed
+        os.utime(test_file, ns=(2_000_000_000, 2_000_000_000))
+        file_stats = {}
+        files = read_files([str(test_file)], stats=file_stats)
+        changed, _ = idx.get_stale_files(files, file_stats=file_stats)
+        assert changed == []
+        assert idx._load_manifest()["files"]["test.py"]["mtime_ns"] == 2_000_000_000
+
+        # Same size, new mtime, different content: detected by hash
+        test_file.write_text("def bar(): pass\n")
+        os.utime(test_file, ns=(3_000_000_000, 3_000_000_000))
+        changed, _ = idx.get_stale_files({str(test_file): test_file.read_text()})
+        assert changed == [str(test_file)]
+
+    print("SemanticIndex stat fast path: PASS")
+
+
+def test_semantic_index_stale_paths():
+    """Test stat-only stale check and partial update (no reads when unchanged)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir).resolve()
+
+        keep = tmpdir / "keep.py"
+        edit = tmpdir / "edit.py"
+        gone = tmpdir / "gone.py"
+        for f in (keep, edit, gone):
+            f.write_text(f"def {f.stem}(): pass\n")
+            os.utime(f, ns=(1_000_000_000, 1_000_000_000))
+
+        idx = SemanticIndex(tmpdir)
+        file_stats = {}
+        files = read_files([str(f) for f in (keep, edit, gone)], stats=file_stats)
+        idx.index(files, file_stats=file_stats)
+
+        # Nothing changed: no candidates, nothing to read
+        assert idx.get_stale_paths(scan_metadata(tmpdir)) == ([], [])
+
+        edit.write_text("def edited(): return 1\n")
+        os.utime(edit, ns=(2_000_000_000, 2_000_000_000))
+        gone.unlink()
+
+        candidates, deleted = idx.get_stale_paths(scan_metadata(tmpdir))
+        assert candidates == [str(edit)]
+        assert deleted == ["gone.py"]
+
+        # Update from only the changed candidates; unread files must be kept
+        file_stats = {}
+        files = read_files(candidates, stats=file_stats)
+        changed, _ = idx.get_stale_files(files, paths=candidates, file_stats=file_stats)
+        assert changed == [str(edit)]
+        with mock.patch.object(idx, "get_stale_files") as recheck:
+            stats = idx.update(
+                {f: files[f] for f in changed}, deleted=deleted, file_stats=file_stats
+            )
+        recheck.assert_not_called()
+        assert stats["files"] == 1
+        assert stats["deleted"] >= 1
+
+        indexed = idx._load_manifest()["files"]
+        assert set(indexed) == {"keep.py", "edit.py"}
+        assert indexed["edit.py"]["mtime_ns"] == 2_000_000_000
+        assert idx.get_stale_paths(scan_metadata(tmpdir)) == ([], [])
+
+    print("SemanticIndex stale paths: PASS")
+
+
+def test_semantic_index_edit_during_index():
+    """Test a file saved after it was read (but before indexing finished) is re-indexed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir).resolve()
+
+        code_file = tmpdir / "a.py"
+        code_file.write_text("def old(): pass\n")
+        os.utime(code_file, ns=(1_000_000_000, 1_000_000_000))
+
+        file_stats = {}
+        files = scan(str(tmpdir), ".", stats=file_stats)
+
+        # Saved between the read and the end of indexing, outside the racy window
+        code_file.write_text("def new(): return 1\n")
+        os.utime(code_file, ns=(2_000_000_000, 2_000_000_000))
+
+        idx = SemanticIndex(tmpdir)
+        idx.index(files, file_stats=file_stats)
+
+        # Manifest holds the stat of the content that was indexed, so the edit shows
+        candidates, _ = idx.get_stale_paths(scan_metadata(tmpdir))
+        assert candidates == [str(code_file)]
+
+        file_stats = {}
+        files = read_files(candidates, stats=file_stats)
+        idx.update(files, deleted=[], file_stats=file_stats)
+        assert idx.get_stale_paths(scan_metadata(tmpdir)) == ([], [])
+        assert [r["name"] for r in idx.search("new", k=5)] == ["new"]
+
+    print("SemanticIndex edit during index: PASS")
+
+
+def test_semantic_index_unindexable_files():
+    """Test binary, non-UTF-8, and empty files stop being stale after one check."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir).resolve()
+
+        code_file = tmpdir / "a.py"
+        code_file.write_text("def a(): pass\n")
+        (tmpdir / "font.ttf").write_bytes(b"\x00\x01\x02")
+        (tmpdir / "notes.txt").write_bytes("caf\u00e9\n".encode("latin-1"))
+        (tmpdir / "__init__.py").touch()
+        for f in tmpdir.iterdir():
+            os.utime(f, ns=(1_000_000_000, 1_000_000_000))
+
+        idx = SemanticIndex(tmpdir)
+        file_stats = {}
+        idx.index(scan(str(tmpdir), ".", stats=file_stats), file_stats=file_stats)
+
+        # Empty files aren't candidates; binary ones are until read once
+        candidates, deleted = idx.get_stale_paths(scan_metadata(tmpdir))
+        assert sorted(candidates) == [str(tmpdir / "font.ttf"), str(tmpdir / "notes.txt")]
+        assert deleted == []
+
+        file_stats = {}
+        files = read_files(candidates, stats=file_stats)
+        assert idx.get_stale_files(files, paths=candidates, file_stats=file_stats) == ([], [])
+        assert idx.get_stale_paths(scan_metadata(tmpdir)) == ([], [])
+
+        # Full scans (build, status) don't report them as deleted
+        file_stats = {}
+        files = scan(str(tmpdir), ".", stats=file_stats)
+        assert idx.get_stale_files(files, file_stats=file_stats) == ([], [])
+        assert idx.count() == 1
+
+        # Once readable as text, the file is indexed
+        (tmpdir / "notes.txt").write_text("def notes(): pass\n")
+        candidates, _ = idx.get_stale_paths(scan_metadata(tmpdir))
+        assert candidates == [str(tmpdir / "notes.txt")]
+        file_stats = {}
+        files = read_files(candidates, stats=file_stats)
+        idx.update(files, deleted=[], file_stats=file_stats)
+        assert idx.count() == 2
+
+    print("SemanticIndex unindexable files: PASS")
+
+
+def test_semantic_index_embedding_cache():
+    """Test re-indexing an edited file only embeds blocks whose text changed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+
+        code_file = tmpdir / "code.py"
+        code_file.write_text("def foo():\n    return 1\n\n\ndef bar():\n    return 2\n")
+
+        idx = SemanticIndex(tmpdir)
+        idx.index({str(code_file): code_file.read_text()})
+
+        # Record which texts reach the model
+        embedded = []
+        original_embed = idx.embedder.embed
+
+        def counting_embed(texts):
+            embedded.extend(texts)
+            return original_embed(texts)
+
+        idx.embedder.embed = counting_embed
+
+        # Edit only bar()
+        code_file.write_text("def foo():\n    return 1\n\n\ndef bar():\n    return 3\n")
+        stats = idx.update({str(code_file): code_file.read_text()})
+
+        assert stats["blocks"] == 2, "Both blocks are still stored"
+        assert len(embedded) == 1 and "bar" in embedded[0], f"Only bar() re-embedded: {embedded}"
+        assert (tmpdir / INDEX_DIR / EMBED_CACHE_FILE).exists()
+
+        # The old bar() embedding is pruned; only blocks still indexed stay cached
+        def cached_keys():
+            rows = idx._ensure_embed_cache()._conn.execute("SELECT key FROM embeddings")
+            return {key for (key,) in rows}
+
+        assert cached_keys() == set(idx._load_manifest()["files"]["code.py"]["keys"])
+        assert len(cached_keys()) == 2
+
+        code_file.unlink()
+        idx.update({})
+        assert cached_keys() == set()
+
+    print("SemanticIndex embedding cache: PASS")
+
+
+def test_embedding_cache_key_change():
+    """Test cached embeddings under a different key prefix are dropped on open."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / EMBED_CACHE_FILE
+        key = EmbeddingCache.key("def foo(): pass")
+
+        cache = EmbeddingCache(path)
+        cache.put_many([key], np.ones((1, 4), dtype=np.float32))
+        cache.close()
+
+        cache = EmbeddingCache(path)
+        assert list(cache.get_many([key])) == [key]
+        cache.close()
+
+        # e.g. MAX_LENGTH or the document prefix changed
+        with mock.patch.object(EmbeddingCache, "_KEY_VERSION", EmbeddingCache._KEY_VERSION + 1):
+            cache = EmbeddingCache(path)
+            assert cache.get_many([key]) == {}
+            cache.close()
+
+    print("EmbeddingCache key change: PASS")
+
+
 def test_semantic_index_clear():
     """Test index clearing."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -247,8 +493,6 @@ def test_semantic_index_relative_paths():
         idx.index(files)
 
         # Check manifest has relative paths
-        import json
-
         manifest = json.loads((tmpdir / INDEX_DIR / MANIFEST_FILE).read_text())
         for path in manifest.get("files", {}).keys():
             assert not Path(path).is_absolute(), f"Manifest path should be relative: {path}"
@@ -257,6 +501,161 @@ def test_semantic_index_relative_paths():
     print("SemanticIndex relative paths: PASS")
 
 
+def test_semantic_index_dedup_texts():
+    """Test identical blocks in different files are embedded once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+
+        body = "def get_value(self):\n    return self._value\n"
+        files = {}
+        for name in ("a.py", "b.py", "c.py"):
+            (tmpdir / name).write_text(body)
+            files[str(tmpdir / name)] = body
+
+        idx = SemanticIndex(tmpdir)
+        embedded = []
+        original_embed = idx.embedder.embed
+
+        def counting_embed(texts):
+            embedded.extend(texts)
+            return original_embed(texts)
+
+        idx.embedder.embed = counting_embed
+
+        stats = idx.index(files)
+        assert stats["blocks"] == 3, "Each file's block is still stored"
+        assert len(embedded) == 1, f"Expected 1 embedded text, got {len(embedded)}"
+        assert idx.count() == 3
+
+    print("SemanticIndex dedup texts: PASS")
+
+
+def _write_modules(root: Path, count: int) -> dict[str, str]:
+    """Write count small Python modules under root, returning {path: content}."""
+    files = {}
+    for i in range(count):
+        path = root / f"mod_{i}.py"
+        path.write_text(f"def func_{i}():\n    return {i}\n")
+        files[str(path)] = path.read_text()
+    return files
+
+
+def test_semantic_index_parallel_extract():
+    """Test that large file sets are extracted in worker processes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = _write_modules(Path(tmpdir), 12)
+
+        idx = SemanticIndex(tmpdir)
+        with (
+            mock.patch.object(semantic, "PARALLEL_EXTRACT_MIN_BYTES", 0),
+            mock.patch.object(semantic, "_available_cpus", return_value=2),
+            mock.patch.object(semantic, "_extract_pool", wraps=semantic._extract_pool) as pool,
+            mock.patch.object(idx, "_extract", wraps=idx._extract) as in_process,
+        ):
+            stats = idx.index(files)
+
+        pool.assert_called_once()
+        in_process.assert_not_called()
+        assert stats["files"] == len(files)
+        assert stats["errors"] == 0
+        assert idx.count() == len(files)
+
+    print("SemanticIndex parallel extract: PASS")
+
+
+def test_semantic_index_extract_fallback():
+    """Test extraction stays in-process on one CPU, and when workers fail to start."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = _write_modules(Path(tmpdir), 12)
+
+        idx = SemanticIndex(tmpdir)
+        with (
+            mock.patch.object(semantic, "PARALLEL_EXTRACT_MIN_BYTES", 0),
+            mock.patch.object(semantic, "_available_cpus", return_value=1),
+            mock.patch.object(semantic, "_extract_pool") as pool,
+        ):
+            stats = idx.index(files)
+        pool.assert_not_called()
+        assert stats["files"] == len(files)
+
+        idx.clear()
+        idx = SemanticIndex(tmpdir)
+        with (
+            mock.patch.object(semantic, "PARALLEL_EXTRACT_MIN_BYTES", 0),
+            mock.patch.object(semantic, "_available_cpus", return_value=2),
+            mock.patch.object(semantic, "_extract_pool", side_effect=BrokenProcessPool),
+        ):
+            stats = idx.index(files)
+        assert stats["files"] == len(files)
+        assert stats["errors"] == 0
+        assert idx.count() == len(files)
+
+    print("SemanticIndex extract fallback: PASS")
+
+
+def test_semantic_index_pipelined_batches():
+    """Test every batch is stored with its own embeddings when batches overlap."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+
+        code = "".join(f"def func_{i}():\n    return {i}\n\n\n" for i in range(7))
+        code_file = tmpdir / "funcs.py"
+        code_file.write_text(code)
+
+        idx = SemanticIndex(tmpdir)
+        progress = []
+        stats = idx.index(
+            {str(code_file): code},
+            batch_size=2,
+            on_progress=lambda cur, total, _msg: progress.append((cur, total)),
+        )
+
+        assert stats["blocks"] == 7
+        assert idx.count() == 7
+        assert progress == [(0, 7), (2, 7), (4, 7), (6, 7), (7, 7)]
+
+        # Each block's vector matches its own text (not a neighboring batch's)
+        results = idx.search("def func_5():\n    return 5", k=1)
+        assert results[0]["name"] == "func_5"
+
+    print("SemanticIndex pipelined batches: PASS")
+
+
+def test_semantic_index_length_sorted_batches():
+    """Test blocks are embedded in one global length order, not per batch."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+
+        # Block lengths alternate short/long across the file
+        code = "".join(
+            f"def func_{i}():\n" + "    x = 1\n" * (1 if i % 2 else 8) + f"    return {i}\n\n\n"
+            for i in range(6)
+        )
+        code_file = tmpdir / "funcs.py"
+        code_file.write_text(code)
+
+        idx = SemanticIndex(tmpdir)
+        embed_cached = idx._embed_cached
+        batches = []
+
+        def record(texts):
+            batches.append(texts)
+            return embed_cached(texts)
+
+        idx._embed_cached = record
+        idx.index({str(code_file): code}, batch_size=2)
+
+        lengths = [len(t) for batch in batches for t in batch]
+        assert len(lengths) == 6
+        assert lengths == sorted(lengths, reverse=True), f"Not globally sorted: {lengths}"
+
+        # Sorting must keep each vector with its own block
+        results = idx.search("def func_3():\n    x = 1\n    return 3", k=1)
+        assert results[0]["name"] == "func_3"
+
+    print("SemanticIndex length-sorted batches: PASS")
+
+
 if __name__ == "__main__":
     print("Running semantic tests...\n")
     test_find_index_root_no_existing()
@@ -266,7 +665,18 @@ if __name__ == "__main__":
     test_semantic_index_roundtrip()
     test_semantic_index_incremental_update()
     test_semantic_index_stale_detection()
+    test_semantic_index_stat_fast_path()
+    test_semantic_index_stale_paths()
+    test_semantic_index_edit_during_index()
+    test_semantic_index_unindexable_files()
+    test_semantic_index_embedding_cache()
+    test_embedding_cache_key_change()
     test_semantic_index_clear()
     test_semantic_index_scope_filtering()
     test_semantic_index_relative_paths()
+    test_semantic_index_dedup_texts()
+    test_semantic_index_parallel_extract()
+    test_semantic_index_extract_fallback()
+    test_semantic_index_pipelined_batches()
+    test_semantic_index_length_sorted_batches()
     print("\nAll semantic tests passed!")